@@ -3,14 +3,11 @@ Recruitment Analyst - ÉDITION DASHBOARD ENTERPRISE
 Architecture Modulaire (src/modules/), UI/UX SaaS B2B, et Scoring Strict.
 """
 import streamlit as st
-import pandas as pd
-import json
 import logging
 import os
 import sys
-import re
 import time
-import plotly.graph_objects as go
+import uuid
 
 # --- CONFIGURATION ---
 st.set_page_config(page_title="Talent AI | Enterprise Sourcing", page_icon="🧿", layout="wide", initial_sidebar_state="expanded")
@@ -142,69 +139,53 @@ if current_dir not in sys.path:
     sys.path.insert(0, current_dir)
 
 try:
-    from src.modules.llm_analyzer import create_analyzer
+    from src.modules.llm_analyzer import pinned_models
     from src.modules.pdf_utils import extract_text_from_pdf
+    from src.modules.warmup import ModelWarmup, READY, LOADING
+    from src.modules.ranking import AnytimeRanker, DEFAULT_TOP_K
+    from src.modules.scheduler import InferenceScheduler
+    from src.modules.cancellation import CampaignCancelled, new_campaign_token, reclaimed_summary
+    from src.modules.history_store import CampaignHistoryStore, role_from_job_description
+    from src.modules.scoring import text_hash
+    from src.modules.talent_index import TalentIndex
+    from src.modules.report_renderer import render_report_html
 except ImportError as e:
     st.error(f"Erreur d'import : {e}. Assurez-vous que les dossiers 'src' et 'modules' contiennent bien des fichiers __init__.py")
     st.stop()
 
 logging.basicConfig(level=logging.INFO)
 
-# ==================== LOGIQUE MÉTIER ====================
-def _process_cv_one_shot(text_content, job_desc) -> dict:
-    llm = create_analyzer()
-    prompt = f"""
-    Tu es un Directeur Technique et Recruteur IMPITOYABLE. 
-    TACHE : Évalue l'adéquation technique exacte entre ce CV et cette offre.
-    
-    JOB DESCRIPTION: {job_desc[:1500]}
-    TEXTE DU CV : {text_content[:6000]}
-    
-    RÈGLES DE SCORING (BARÈME MATHÉMATIQUE STRICT) :
-    🚨 RÈGLE DE SURVIE : Si l'expérience du candidat n'a RIEN A VOIR avec le métier de l'offre (ex: un commercial qui postule comme Data Scientist), le score 'n_hard_skills_coeur' DOIT ÊTRE DE 0/65.
-    
-    - 'n_hard_skills_coeur' (Sur 65) : Calcule la note ainsi :
-        * 55-65 : Le candidat maîtrise 100% des technologies clés de l'offre avec des années de pratique prouvées.
-        * 35-54 : Le candidat maîtrise certaines technos, mais il lui manque au moins une compétence technique CRUCIALE demandée dans l'offre.
-        * 15-34 : Connaissances théoriques, profil junior, ou ne possède que 20% de la stack technique demandée.
-        * 0-14 : Débutant total ou profil hors sujet.
-        
-    - 'n_outils_metier' (Sur 10) : 1 point par outil de l'offre réellement écrit sur le CV.
-    - 'n_business_impact' (Sur 10) : 0/10 direct s'il n'y a AUCUNE métrique chiffrée (euros, pourcentages) dans ses expériences.
-    - 'n_seniorite' (Sur 5) : 5 uniquement si le nombre d'années d'expérience requis est atteint.
-    - 'n_soft_skills' (Sur 5) : Ne mets jamais plus de 3.
-    - 'n_storytelling' (Sur 5) : Ne mets jamais plus de 3.
-    
-    OUTPUT JSON STRICT : 
-    IMPORTANT : Tu dois obligatoirement remplir la clé "analyse_preliminaire" EN PREMIER pour justifier tes futurs scores en listant ce qu'il MANQUE au candidat.
-    {{ 
-        "analyse_preliminaire": "Le candidat maîtrise X et Y, mais il ne mentionne absolument pas Z qui est requis. Son impact business n'est pas chiffré. Le score technique sera donc moyen/faible.",
-        "nom": "Prénom Nom",
-        "titre_profil": "Titre du profil sur le CV",
-        "email": "email@trouvé_ou_vide",
-        "années_exp": 0,
-        "compétences": ["C1", "C2"],
-        "réalisations_clés": ["Action 1", "Action 2"],
-        "n_hard_skills_coeur": 0, 
-        "n_outils_metier": 0, 
-        "n_business_impact": 0,
-        "n_seniorite": 0, 
-        "n_soft_skills": 0, 
-        "n_storytelling": 0,
-        "strength": "Atout majeur prouvé", 
-        "risk": "Lacune technique ou métier précise", 
-        "reasoning": "Conclusion ultra-courte" 
-    }}
-    """
-    try:
-        response = llm.client.generate_content(prompt)
-        txt = response.text
-        json_match = re.search(r'\{.*\}', txt, re.DOTALL)
-        if json_match: return json.loads(json_match.group(0))
-        return {"nom": "Erreur JSON"}
-    except Exception as e: return {"nom": f"Erreur IA : {str(e)}"}
+@st.cache_resource
+def get_model_warmup():
+    """Un seul préchargement par process, partagé par toutes les sessions."""
+    return ModelWarmup().start()
+
+@st.cache_resource
+def get_inference_scheduler():
+    """File d'attente Ollama commune : les sessions ne se battent plus pour les slots."""
+    return InferenceScheduler()
 
+@st.cache_resource
+def get_history_store():
+    return CampaignHistoryStore()
+
+@st.cache_resource
+def get_talent_index():
+    """Index du vivier chargé une fois par process (segments fusionnés en mémoire)."""
+    return TalentIndex()
+
+model_warmup = get_model_warmup()
+inference_scheduler = get_inference_scheduler()
+history_store = get_history_store()
+talent_index = get_talent_index()
+
+if "session_id" not in st.session_state:
+    st.session_state["session_id"] = uuid.uuid4().hex[:8]
+session_id = st.session_state["session_id"]
+
+# ==================== LOGIQUE MÉTIER ====================
 def create_radar_chart(res):
+    import plotly.graph_objects as go # ⚡ Import paresseux : plotly ralentit le démarrage de Streamlit
     categories = ['Cœur Tech', 'Outils', 'Impact', 'Séniorité', 'Soft Skills', 'Clarté/Récit']
     values = [
         (res.get('n_coeur', 0) / 65) * 100, (res.get('n_outils', 0) / 10) * 100,
@@ -234,6 +215,143 @@ def make_progress_bar(label, value, max_val, color_hex="#3B82F6"):
     <div class="meter-container"><div class="meter-fill" style="width: {percent}%; background-color: {color_hex};"></div></div>
     """
 
+def save_campaign_history(campaign_id, results, job_desc):
+    """Archive les candidats notés (sous-scores, compétences, modèle, durées) dans l'historique Parquet."""
+    try:
+        history_store.append(campaign_id, results, role=role_from_job_description(job_desc), job_hash=text_hash(job_desc))
+    except Exception as e:
+        logging.warning(f"Historique non enregistré : {e}")
+
+def index_campaign_cvs(campaign_id, candidates, results):
+    """Ajoute le texte de tous les CV de la campagne au vivier, notés ou non."""
+    names = {r.get("file_name"): r.get("nom", "") for r in results}
+    documents = [
+        {"text": text, "file_name": file_name, "nom": names.get(file_name, ""), "campaign_id": campaign_id}
+        for file_name, text in candidates
+    ]
+    try:
+        talent_index.add_documents(documents)
+    except Exception as e:
+        logging.warning(f"Vivier non indexé : {e}")
+
+def render_leaderboard(placeholder, ranker):
+    """Classement live pendant le scoring (top-K uniquement)."""
+    rows = "".join(
+        f"<div style='font-size: 0.9rem; color: #0F172A; padding: 2px 0;'><b>{rank}.</b> {r.get('nom', 'Anonyme')} — <b>{r.get('score_final', 0)}</b></div>"
+        for rank, r in enumerate(ranker.ranked()[:ranker.top_k], start=1)
+    )
+    scored = ranker.total - ranker.remaining
+    placeholder.markdown(f"<div class='dash-card' style='margin: 0 1rem 1rem 1rem;'><div style='color:#64748B; font-size:0.8rem; font-weight:700;'>📡 CLASSEMENT EN DIRECT ({scored}/{ranker.total})</div>{rows}</div>", unsafe_allow_html=True)
+
+def render_report(results, volume, elapsed=None, unscored=None):
+    # --- HEADER KPI DASHBOARD ---
+    title = f"Rapport d'Analyse (Généré en {round(elapsed, 1)}s)" if elapsed is not None else "Rapport d'Analyse"
+    st.markdown(f"<h3 style='color: #0F172A; margin-bottom: 1rem; padding-left: 1rem;'>{title}</h3>", unsafe_allow_html=True)
+    # Rapport statique autonome (radars SVG, sans Plotly) : lisible hors ligne, envoyable par e-mail
+    st.download_button(
+        "📥 Télécharger le rapport HTML",
+        data=render_report_html(results, volume=volume, role=role_from_job_description(job_description), elapsed=elapsed, unscored=unscored),
+        file_name=f"rapport_{time.strftime('%Y%m%d_%H%M')}.html",
+        mime="text/html",
+    )
+
+    kpi1, kpi2, kpi3, kpi4 = st.columns(4)
+    with kpi1:
+        # Arrêt anticipé : les KPI suivants ne portent que sur les CV notés
+        unscored_note = f"<div style='color:#64748B; font-size:0.8rem;'>dont {len(unscored)} non notés</div>" if unscored else ""
+        st.markdown(f"<div class='dash-card'><div style='color:#64748B; font-size:0.8rem; font-weight:700;'>VOLUMÉTRIE</div><div style='font-size:2rem; font-weight:800; color:#0F172A;'>{volume}</div>{unscored_note}</div>", unsafe_allow_html=True)
+    with kpi2:
+        st.markdown(f"<div class='dash-card'><div style='color:#64748B; font-size:0.8rem; font-weight:700;'>MEILLEUR MATCH</div><div style='font-size:2rem; font-weight:800; color:#10B981;'>{results[0].get('score_final', 0)}%</div></div>", unsafe_allow_html=True)
+    with kpi3:
+        avg_score = int(sum([r.get('score_final', 0) for r in results]) / len(results)) if results else 0
+        avg_label = "MOYENNE DES CV NOTÉS" if unscored else "MOYENNE DU POOL"
+        st.markdown(f"<div class='dash-card'><div style='color:#64748B; font-size:0.8rem; font-weight:700;'>{avg_label}</div><div style='font-size:2rem; font-weight:800; color:#3B82F6;'>{avg_score}%</div></div>", unsafe_allow_html=True)
+    with kpi4:
+        ecart = results[0].get('score_final', 0) - (results[1].get('score_final', 0) if len(results)>1 else 0)
+        st.markdown(f"<div class='dash-card'><div style='color:#64748B; font-size:0.8rem; font-weight:700;'>ÉCART N°1 vs N°2</div><div style='font-size:2rem; font-weight:800; color:#F59E0B;'>+{ecart} pts</div></div>", unsafe_allow_html=True)
+
+    st.markdown("<br>", unsafe_allow_html=True)
+
+    # --- SPOTLIGHT : LE MEILLEUR CANDIDAT ---
+    if len(results) > 0 and results[0].get('score_final', 0) > 0:
+        top_cand = results[0]
+        st.markdown("<h4 style='color: #0F172A; margin-bottom: 1rem; padding-left: 1rem;'>🏆 Recommandation Numéro 1</h4>", unsafe_allow_html=True)
+
+        with st.container():
+            st.markdown("<div class='spotlight-card' style='margin: 0 1rem;'>", unsafe_allow_html=True)
+
+            spot_col1, spot_col2, spot_col3 = st.columns([1.5, 2, 1.5])
+
+            with spot_col1:
+                st.markdown(f"<div style='font-size:3.5rem; font-weight:900; color:#3B82F6; line-height:1;'>{top_cand.get('score_final', 0)}</div>", unsafe_allow_html=True)
+                st.markdown(f"<h2 style='margin-top:10px; margin-bottom:0;'>{top_cand.get('nom', 'Anonyme')}</h2>", unsafe_allow_html=True)
+                st.markdown(f"<p style='color:#64748B; font-weight:500;'>{top_cand.get('titre_profil', '')} • {top_cand.get('années_exp', 0)} ans</p>", unsafe_allow_html=True)
+
+                comps = top_cand.get('compétences', [])
+                if isinstance(comps, list):
+                    badges = "".join([f"<span class='badge-tech'>{c}</span>" for c in comps[:5]])
+                    st.markdown(f"<div style='margin-top:15px;'>{badges}</div>", unsafe_allow_html=True)
+
+            with spot_col2:
+                st.markdown("<div style='padding-top: 10px;'>", unsafe_allow_html=True)
+                bars_html = make_progress_bar("Tech Cœur", top_cand.get('n_coeur',0), 65, "#3B82F6")
+                bars_html += make_progress_bar("Outils", top_cand.get('n_outils',0), 10, "#8B5CF6")
+                bars_html += make_progress_bar("Impact ROI", top_cand.get('n_imp',0), 10, "#10B981")
+                st.markdown(bars_html, unsafe_allow_html=True)
+                st.markdown("</div>", unsafe_allow_html=True)
+
+            with spot_col3:
+                # FIX: Ajout de la clé unique pour le graphique Spotlight
+                st.plotly_chart(create_radar_chart(top_cand), use_container_width=True, config={'displayModeBar': False}, key="radar_top")
+
+            st.markdown("<hr style='border-color: #E2E8F0; margin: 15px 0;'>", unsafe_allow_html=True)
+            st.markdown(f"**Synthèse IA :** {top_cand.get('reasoning', '')}")
+            st.markdown(f"<div style='color:#10B981; font-size:0.9rem; margin-top:5px;'><b>Force :</b> {top_cand.get('strength', '')}</div>", unsafe_allow_html=True)
+            st.markdown(f"<div style='color:#EF4444; font-size:0.9rem;'><b>Risque :</b> {top_cand.get('risk', '')}</div>", unsafe_allow_html=True)
+
+            st.markdown("</div>", unsafe_allow_html=True) 
+
+    # --- RUNNER UPS ---
+    if len(results) > 1:
+        st.markdown("<br><h4 style='color: #0F172A; margin-bottom: 1rem; padding-left: 1rem;'>📋 Autres Profils Analysés</h4>", unsafe_allow_html=True)
+
+        # FIX: Ajout de enumerate pour générer un ID unique par graphique
+        for idx, res in enumerate(results[1:]):
+            score = res.get('score_final', 0)
+            color = "#10B981" if score >= 60 else ("#F59E0B" if score >= 40 else "#EF4444")
+
+            st.markdown(f"""
+            <div class='dash-card' style='margin: 0 1rem 0px 1rem; display: flex; align-items: center; padding: 15px 20px; border-bottom: none; border-bottom-left-radius: 0; border-bottom-right-radius: 0;'>
+                <div style='background: {color}; color: white; border-radius: 8px; font-weight: 800; font-size: 1.2rem; padding: 8px 12px; margin-right: 20px; min-width: 60px; text-align: center;'>
+                    {score}
+                </div>
+                <div style='flex-grow: 1;'>
+                    <div style='font-size: 1.1rem; font-weight: 700; color: #0F172A;'>{res.get('nom', 'Anonyme')} <span style='font-weight: 400; color: #64748B; font-size: 0.9rem;'>— {res.get('titre_profil', '')}</span></div>
+                    <div style='font-size: 0.85rem; color: #475569; margin-top: 4px;'><b>Tech:</b> {res.get('n_coeur',0)}/65 &nbsp;|&nbsp; <b>Outils:</b> {res.get('n_outils',0)}/10 &nbsp;|&nbsp; <b>Impact:</b> {res.get('n_imp',0)}/10</div>
+                </div>
+            </div>
+            """, unsafe_allow_html=True)
+
+            with st.container():
+                st.markdown("<div style='padding: 0 1rem;'>", unsafe_allow_html=True)
+                with st.expander("📊 Voir l'analyse détaillée et le graphique"):
+                    col_r1, col_r2 = st.columns([1, 1.5])
+
+                    with col_r1:
+                        # FIX: Ajout de la clé unique basée sur l'index de la boucle
+                        st.plotly_chart(create_radar_chart(res), use_container_width=True, config={'displayModeBar': False}, key=f"radar_runner_{idx}")
+
+                    with col_r2:
+                        st.markdown(f"**Synthèse :** {res.get('reasoning', '')}")
+                        st.markdown(f"**💪 Force :** <span style='color:#10B981;'>{res.get('strength', '-')}</span>", unsafe_allow_html=True)
+                        st.markdown(f"**⚠️ Risque :** <span style='color:#EF4444;'>{res.get('risk', '-')}</span>", unsafe_allow_html=True)
+                st.markdown("</div>", unsafe_allow_html=True)
+
+    # --- CV NON NOTÉS (arrêt anticipé) ---
+    if unscored:
+        with st.expander(f"⏸️ {len(unscored)} CV non analysés (exclus des indicateurs)"):
+            st.markdown("\n".join(f"- {name}" for name in unscored))
+
 # ==================== INTERFACE SAAS ====================
 with st.sidebar:
     st.markdown("<h2 style='color: white; font-weight: 900; font-size: 1.8rem; margin-bottom: 0;'>🧿 TALENT<span style='color: #3B82F6;'>.AI</span></h2>", unsafe_allow_html=True)
@@ -245,9 +363,56 @@ with st.sidebar:
     st.markdown("<br><p style='font-size: 0.8rem; font-weight: 700; color: #94A3B8; text-transform: uppercase; margin-bottom: 5px;'>2. Job Description</p>", unsafe_allow_html=True)
     job_description = st.text_area("Offre", height=200, placeholder="Exigences techniques, missions, stack...", label_visibility="collapsed")
     
+    st.markdown("<br>", unsafe_allow_html=True)
+    progressive_mode = st.checkbox("Mode progressif (arrêt anticipé, estimation par mots-clés)", value=False)
+    top_k = st.number_input("Taille du top", min_value=1, max_value=50, value=DEFAULT_TOP_K, disabled=not progressive_mode)
+    continue_in_background = st.checkbox("Continuer en arrière-plan après stabilisation", value=False, disabled=not progressive_mode)
+
     st.markdown("<br>", unsafe_allow_html=True)
     launch_btn = st.button("Lancer le Scanning ⚡", use_container_width=True)
 
+    # --- ÉTAT DES MODÈLES (warm-up) ---
+    st.markdown("<br><p style='font-size: 0.8rem; font-weight: 700; color: #94A3B8; text-transform: uppercase; margin-bottom: 5px;'>Moteurs IA</p>", unsafe_allow_html=True)
+    for model_name, state in model_warmup.refresh().items():
+        if state == READY:
+            dot, label = "🟢", "prêt"
+        elif state == LOADING:
+            dot, label = "🟠", "chargement..."
+        else:
+            dot, label = "⚪", "à la demande"
+        st.markdown(f"<p style='font-size: 0.8rem; margin: 0;'>{dot} {model_name} — {label}</p>", unsafe_allow_html=True)
+
+    # --- FILE D'ATTENTE PARTAGÉE ---
+    queue_state = inference_scheduler.snapshot()
+    st.markdown("<br><p style='font-size: 0.8rem; font-weight: 700; color: #94A3B8; text-transform: uppercase; margin-bottom: 5px;'>File d'attente</p>", unsafe_allow_html=True)
+    st.markdown(f"<p style='font-size: 0.8rem; margin: 0;'>{queue_state['active']}/{queue_state['max_concurrency']} slots occupés • {queue_state['waiting']} en attente</p>", unsafe_allow_html=True)
+    session_stats = inference_scheduler.stats.get(session_id)
+    if session_stats and session_stats.completed:
+        st.markdown(f"<p style='font-size: 0.8rem; margin: 0;'>Votre débit : {session_stats.throughput_per_min} CV/min • attente moy. {session_stats.avg_wait_seconds}s</p>", unsafe_allow_html=True)
+    reclaimed = reclaimed_summary(session_id, queue_state['avg_request_seconds'])
+    if reclaimed['campaigns_cancelled']:
+        st.markdown(f"<p style='font-size: 0.8rem; margin: 0;'>♻️ Calcul récupéré : ~{reclaimed['reclaimed_seconds']}s ({reclaimed['aborted_generations']} générations coupées, {reclaimed['dropped_requests']} requêtes abandonnées)</p>", unsafe_allow_html=True)
+
+    # --- RECHERCHE DANS LE VIVIER ---
+    st.markdown("<br><p style='font-size: 0.8rem; font-weight: 700; color: #94A3B8; text-transform: uppercase; margin-bottom: 5px;'>Vivier de talents</p>", unsafe_allow_html=True)
+    talent_query = st.text_input("Recherche vivier", placeholder='"data engineer" AND (aws OR gcp) -stage', label_visibility="collapsed")
+    if talent_query:
+        try:
+            matches = talent_index.search(talent_query, limit=10)
+        except Exception as e:
+            # Un index abîmé ne doit pas bloquer le reste de l'app
+            logging.warning(f"Recherche vivier impossible : {e}")
+            matches = []
+        st.markdown(f"<p style='font-size: 0.8rem; margin: 0;'>{len(matches)} résultat(s) sur {len(talent_index.docs)} CV indexés</p>", unsafe_allow_html=True)
+        for score, doc in matches:
+            st.markdown(f"<p style='font-size: 0.8rem; margin: 0;'>• {doc.get('nom') or doc.get('file_name', '')} <span style='color: #64748B;'>({doc.get('file_name', '')}, {score})</span></p>", unsafe_allow_html=True)
+
+# Offre modifiée : le classement en arrière-plan ne correspond plus, on l'arrête
+background_ranker = st.session_state.get("background_ranker")
+if background_ranker is not None and job_description != background_ranker.job_desc:
+    background_ranker.cancel_token.cancel("job_description_changed")
+    del st.session_state["background_ranker"]
+
 # --- ZONE CENTRALE ---
 if not launch_btn and not uploaded_files:
     st.markdown("""
@@ -287,117 +452,67 @@ elif launch_btn:
     if not uploaded_files or not job_description:
         st.warning("⚠️ Inputs manquants. Remplissez la barre latérale.")
     else:
-        results = []
-        with st.spinner('Analyse par réseau de neurones en cours...'):
-            start_time = time.time()
-            for i, file in enumerate(uploaded_files):
-                text = extract_text_from_pdf(file)
-                if not text or len(text) < 20 or "ERREUR" in text:
-                    results.append({"nom": file.name, "score_final": 0, "reasoning": "Illisible."})
-                else:
-                    data = _process_cv_one_shot(text, job_description)
-                    n_coeur = min(int(data.get("n_hard_skills_coeur", 0)), 65)
-                    n_outils = min(int(data.get("n_outils_metier", 0)), 10)
-                    n_imp = min(int(data.get("n_business_impact", 0)), 10)
-                    n_sen = min(int(data.get("n_seniorite", 0)), 5)
-                    n_soft = min(int(data.get("n_soft_skills", 0)), 5)
-                    n_story = min(int(data.get("n_storytelling", 0)), 5)
-                    
-                    final_score = n_coeur + n_outils + n_imp + n_sen + n_soft + n_story
-                    data.update({"score_final": final_score, "n_coeur": n_coeur, "n_outils": n_outils, "n_imp": n_imp, "n_sen": n_sen, "n_soft": n_soft, "n_story": n_story})
-                    results.append(data)
-            end_time = time.time()
-
-        results.sort(key=lambda x: int(x.get('score_final', 0)), reverse=True)
-        
-        # --- HEADER KPI DASHBOARD ---
-        st.markdown(f"<h3 style='color: #0F172A; margin-bottom: 1rem; padding-left: 1rem;'>Rapport d'Analyse (Généré en {round(end_time - start_time, 1)}s)</h3>", unsafe_allow_html=True)
-        
-        kpi1, kpi2, kpi3, kpi4 = st.columns(4)
-        with kpi1:
-            st.markdown(f"<div class='dash-card'><div style='color:#64748B; font-size:0.8rem; font-weight:700;'>VOLUMÉTRIE</div><div style='font-size:2rem; font-weight:800; color:#0F172A;'>{len(uploaded_files)}</div></div>", unsafe_allow_html=True)
-        with kpi2:
-            st.markdown(f"<div class='dash-card'><div style='color:#64748B; font-size:0.8rem; font-weight:700;'>MEILLEUR MATCH</div><div style='font-size:2rem; font-weight:800; color:#10B981;'>{results[0].get('score_final', 0)}%</div></div>", unsafe_allow_html=True)
-        with kpi3:
-            avg_score = int(sum([r.get('score_final', 0) for r in results]) / len(results)) if results else 0
-            st.markdown(f"<div class='dash-card'><div style='color:#64748B; font-size:0.8rem; font-weight:700;'>MOYENNE DU POOL</div><div style='font-size:2rem; font-weight:800; color:#3B82F6;'>{avg_score}%</div></div>", unsafe_allow_html=True)
-        with kpi4:
-            ecart = results[0].get('score_final', 0) - (results[1].get('score_final', 0) if len(results)>1 else 0)
-            st.markdown(f"<div class='dash-card'><div style='color:#64748B; font-size:0.8rem; font-weight:700;'>ÉCART N°1 vs N°2</div><div style='font-size:2rem; font-weight:800; color:#F59E0B;'>+{ecart} pts</div></div>", unsafe_allow_html=True)
-
-        st.markdown("<br>", unsafe_allow_html=True)
-
-        # --- SPOTLIGHT : LE MEILLEUR CANDIDAT ---
-        if len(results) > 0 and results[0].get('score_final', 0) > 0:
-            top_cand = results[0]
-            st.markdown("<h4 style='color: #0F172A; margin-bottom: 1rem; padding-left: 1rem;'>🏆 Recommandation Numéro 1</h4>", unsafe_allow_html=True)
-            
-            with st.container():
-                st.markdown("<div class='spotlight-card' style='margin: 0 1rem;'>", unsafe_allow_html=True)
-                
-                spot_col1, spot_col2, spot_col3 = st.columns([1.5, 2, 1.5])
-                
-                with spot_col1:
-                    st.markdown(f"<div style='font-size:3.5rem; font-weight:900; color:#3B82F6; line-height:1;'>{top_cand.get('score_final', 0)}</div>", unsafe_allow_html=True)
-                    st.markdown(f"<h2 style='margin-top:10px; margin-bottom:0;'>{top_cand.get('nom', 'Anonyme')}</h2>", unsafe_allow_html=True)
-                    st.markdown(f"<p style='color:#64748B; font-weight:500;'>{top_cand.get('titre_profil', '')} • {top_cand.get('années_exp', 0)} ans</p>", unsafe_allow_html=True)
-                    
-                    comps = top_cand.get('compétences', [])
-                    if isinstance(comps, list):
-                        badges = "".join([f"<span class='badge-tech'>{c}</span>" for c in comps[:5]])
-                        st.markdown(f"<div style='margin-top:15px;'>{badges}</div>", unsafe_allow_html=True)
-                
-                with spot_col2:
-                    st.markdown("<div style='padding-top: 10px;'>", unsafe_allow_html=True)
-                    bars_html = make_progress_bar("Tech Cœur", top_cand.get('n_coeur',0), 65, "#3B82F6")
-                    bars_html += make_progress_bar("Outils", top_cand.get('n_outils',0), 10, "#8B5CF6")
-                    bars_html += make_progress_bar("Impact ROI", top_cand.get('n_imp',0), 10, "#10B981")
-                    st.markdown(bars_html, unsafe_allow_html=True)
-                    st.markdown("</div>", unsafe_allow_html=True)
-                
-                with spot_col3:
-                    # FIX: Ajout de la clé unique pour le graphique Spotlight
-                    st.plotly_chart(create_radar_chart(top_cand), use_container_width=True, config={'displayModeBar': False}, key="radar_top")
-                
-                st.markdown("<hr style='border-color: #E2E8F0; margin: 15px 0;'>", unsafe_allow_html=True)
-                st.markdown(f"**Synthèse IA :** {top_cand.get('reasoning', '')}")
-                st.markdown(f"<div style='color:#10B981; font-size:0.9rem; margin-top:5px;'><b>Force :</b> {top_cand.get('strength', '')}</div>", unsafe_allow_html=True)
-                st.markdown(f"<div style='color:#EF4444; font-size:0.9rem;'><b>Risque :</b> {top_cand.get('risk', '')}</div>", unsafe_allow_html=True)
-                
-                st.markdown("</div>", unsafe_allow_html=True) 
-
-        # --- RUNNER UPS ---
-        if len(results) > 1:
-            st.markdown("<br><h4 style='color: #0F172A; margin-bottom: 1rem; padding-left: 1rem;'>📋 Autres Profils Analysés</h4>", unsafe_allow_html=True)
-            
-            # FIX: Ajout de enumerate pour générer un ID unique par graphique
-            for idx, res in enumerate(results[1:]):
-                score = res.get('score_final', 0)
-                color = "#10B981" if score >= 60 else ("#F59E0B" if score >= 40 else "#EF4444")
-                
-                st.markdown(f"""
-                <div class='dash-card' style='margin: 0 1rem 0px 1rem; display: flex; align-items: center; padding: 15px 20px; border-bottom: none; border-bottom-left-radius: 0; border-bottom-right-radius: 0;'>
-                    <div style='background: {color}; color: white; border-radius: 8px; font-weight: 800; font-size: 1.2rem; padding: 8px 12px; margin-right: 20px; min-width: 60px; text-align: center;'>
-                        {score}
-                    </div>
-                    <div style='flex-grow: 1;'>
-                        <div style='font-size: 1.1rem; font-weight: 700; color: #0F172A;'>{res.get('nom', 'Anonyme')} <span style='font-weight: 400; color: #64748B; font-size: 0.9rem;'>— {res.get('titre_profil', '')}</span></div>
-                        <div style='font-size: 0.85rem; color: #475569; margin-top: 4px;'><b>Tech:</b> {res.get('n_coeur',0)}/65 &nbsp;|&nbsp; <b>Outils:</b> {res.get('n_outils',0)}/10 &nbsp;|&nbsp; <b>Impact:</b> {res.get('n_imp',0)}/10</div>
-                    </div>
-                </div>
-                """, unsafe_allow_html=True)
-                
-                with st.container():
-                    st.markdown("<div style='padding: 0 1rem;'>", unsafe_allow_html=True)
-                    with st.expander("📊 Voir l'analyse détaillée et le graphique"):
-                        col_r1, col_r2 = st.columns([1, 1.5])
-                        
-                        with col_r1:
-                            # FIX: Ajout de la clé unique basée sur l'index de la boucle
-                            st.plotly_chart(create_radar_chart(res), use_container_width=True, config={'displayModeBar': False}, key=f"radar_runner_{idx}")
-                        
-                        with col_r2:
-                            st.markdown(f"**Synthèse :** {res.get('reasoning', '')}")
-                            st.markdown(f"**💪 Force :** <span style='color:#10B981;'>{res.get('strength', '-')}</span>", unsafe_allow_html=True)
-                            st.markdown(f"**⚠️ Risque :** <span style='color:#EF4444;'>{res.get('risk', '-')}</span>", unsafe_allow_html=True)
-                    st.markdown("</div>", unsafe_allow_html=True)
\ No newline at end of file
+        candidates = [(file.name, extract_text_from_pdf(file)) for file in uploaded_files]
+        queue_status = st.empty()
+        generation_status = st.empty()
+        leaderboard = st.empty()
+
+        def on_queue_wait(position, eta):
+            queue_status.info(f"🕒 File d'attente partagée : position {position} — démarrage estimé dans ~{eta}s")
+
+        def on_cv_scored(ranker, _):
+            render_leaderboard(leaderboard, ranker)
+            if ranker.remaining:
+                queue_status.caption(f"⏳ {ranker.remaining} CV restants — fin estimée dans ~{inference_scheduler.campaign_eta(session_id, ranker.remaining)}s")
+
+        # Nouvelle campagne : celle d'avant (ex. classement en arrière-plan) est annulée
+        st.session_state.pop("background_ranker", None)
+        cancel_token = new_campaign_token(session_id)
+        campaign_id = uuid.uuid4().hex[:8]
+        ranker = None
+
+        try:
+            with st.spinner('Analyse par réseau de neurones en cours...'), pinned_models() as llm:
+                llm.attach_scheduler(inference_scheduler, session_id, on_wait=on_queue_wait)
+                llm.cancel_token = cancel_token
+                # Chaque rafraîchissement est aussi un point où Streamlit peut interrompre le run
+                llm.on_progress = lambda n_tokens: generation_status.caption(f"✍️ Génération en cours... {n_tokens} tokens")
+                start_time = time.time()
+                ranker = AnytimeRanker(candidates, job_description, top_k=int(top_k), llm=llm, cancel_token=cancel_token)
+                results = ranker.run(on_update=on_cv_scored, stop_when_stable=progressive_mode)
+                end_time = time.time()
+        except BaseException as e:
+            # Campagne annulée ou run interrompu : les CV déjà notés sont archivés quand même
+            if ranker is not None:
+                save_campaign_history(campaign_id, ranker.scored_since(0), job_description)
+            if isinstance(e, CampaignCancelled):
+                st.warning("⚠️ Campagne annulée.")
+                st.stop()
+            raise
+        queue_status.empty()
+        generation_status.empty()
+        leaderboard.empty()
+        n_scored = len(ranker.scored_since(0))
+        save_campaign_history(campaign_id, ranker.scored_since(0), job_description)
+        index_campaign_cvs(campaign_id, candidates, ranker.scored_since(0))
+
+        if not ranker.done:
+            if continue_in_background:
+                llm.on_wait = llm.on_progress = None # Plus de contexte Streamlit dans le thread d'arrière-plan
+                ranker.on_background_done = lambda r: save_campaign_history(campaign_id, r.scored_since(n_scored), job_description)
+                ranker.continue_in_background()
+                st.session_state["background_ranker"] = ranker
+                st.info(f"⏱️ Top {int(top_k)} stabilisé. Les {ranker.remaining} CV restants sont analysés en arrière-plan.")
+            else:
+                st.info(f"⏱️ Arrêt anticipé : {ranker.remaining} CV non analysés. Estimation par mots-clés : un CV rédigé avec d'autres termes que l'offre a pu être écarté à tort.")
+
+        render_report(results, len(uploaded_files), end_time - start_time, unscored=ranker.unscored())
+
+elif st.session_state.get("background_ranker"):
+    ranker = st.session_state["background_ranker"]
+    if ranker.running_in_background:
+        st.info(f"⏳ Analyse en arrière-plan : {ranker.total - ranker.remaining}/{ranker.total} CV notés.")
+        st.button("🔄 Rafraîchir le classement")
+    else:
+        st.success(f"✅ Analyse en arrière-plan terminée : {ranker.total} CV notés.")
+    render_report(ranker.ranked(), ranker.total, unscored=ranker.unscored())
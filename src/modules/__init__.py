@@ -2,11 +2,39 @@
 Initialize modules package (Clean Version)
 """
 
-from .llm_analyzer import LLMAnalyzer, create_analyzer
+from .llm_analyzer import LLMAnalyzer, create_analyzer, pinned_models
 from .pdf_utils import extract_text_from_pdf
+from .warmup import ModelWarmup
+from .scoring import score_cv
+from .ranking import AnytimeRanker
+from .scheduler import InferenceScheduler
+from .cancellation import CampaignCancelled, new_campaign_token
+from .kpi_calculator import KPICalculator, CandidateMetrics
+from .ingestion import ingest_candidates, iter_candidate_chunks
+from .history_store import CampaignHistoryStore
+from .talent_index import TalentIndex
+from .report_renderer import render_report_html
+from .llm_cassette import Cassette, RecordingAnalyzer, ReplayAnalyzer
 
 __all__ = [
     "LLMAnalyzer",
     "create_analyzer",
-    "extract_text_from_pdf"
-]
\ No newline at end of file
+    "pinned_models",
+    "extract_text_from_pdf",
+    "ModelWarmup",
+    "score_cv",
+    "AnytimeRanker",
+    "InferenceScheduler",
+    "CampaignCancelled",
+    "new_campaign_token",
+    "KPICalculator",
+    "CandidateMetrics",
+    "ingest_candidates",
+    "iter_candidate_chunks",
+    "CampaignHistoryStore",
+    "TalentIndex",
+    "render_report_html",
+    "Cassette",
+    "RecordingAnalyzer",
+    "ReplayAnalyzer"
+]
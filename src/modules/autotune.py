@@ -0,0 +1,198 @@
+"""
+Autotune : calibrage des options Ollama sur la machine locale
+Balaye le modèle (tags quantifiés installés), num_ctx, num_predict, num_thread et
+le nombre de requêtes parallèles sur un petit jeu de CV de référence, mesure le débit
+(CV/min) et l'écart aux scores de référence, puis écrit le meilleur profil pour
+cette machine dans config/ollama_profiles.json (chargé par LLMAnalyzer au démarrage).
+
+Dossier de référence : des CV (.pdf ou .txt), l'offre (job.txt) et les scores
+attendus (scores.json : {"nom_du_fichier": score_final}).
+Usage : python -m src.modules.autotune data/reference_cvs [--models llama3.2:1b,llama3.2:3b] [--host NOM]
+"""
+import argparse
+import datetime
+import json
+import logging
+import os
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import requests
+
+from .llm_analyzer import OLLAMA_URL, LLMAnalyzer
+from .ollama_profile import current_host, save_profile
+from .scoring import score_cv
+
+logger = logging.getLogger(__name__)
+
+JOB_FILE = "job.txt"
+SCORES_FILE = "scores.json"
+# Un profil plus rapide n'est retenu que s'il reste à moins de MAX_MAE points des références
+MAX_MAE = 8.0
+NUM_CTX_CANDIDATES = [2048, 3072, 4096, 8192]
+NUM_PREDICT_CANDIDATES = [400, 600, 800, 1000]
+PARALLEL_CANDIDATES = [1, 2, 4]
+
+def load_reference_set(directory):
+    """Renvoie (offre, [(nom du fichier, texte, score attendu)])."""
+    from .pdf_utils import extract_text_from_pdf
+    with open(os.path.join(directory, JOB_FILE), encoding="utf-8") as f:
+        job_desc = f.read()
+    with open(os.path.join(directory, SCORES_FILE), encoding="utf-8") as f:
+        expected = json.load(f)
+    references = []
+    for name, score in sorted(expected.items()):
+        path = os.path.join(directory, name)
+        if name.lower().endswith(".pdf"):
+            with open(path, "rb") as f:
+                text = extract_text_from_pdf(f)
+        else:
+            with open(path, encoding="utf-8") as f:
+                text = f.read()
+        references.append((name, text, float(score)))
+    return job_desc, references
+
+def installed_tags(base_model):
+    """Tags Ollama installés de la même famille ('llama3.2' -> llama3.2:1b, llama3.2:3b-instruct-q4_K_M...)."""
+    family = base_model.split(":")[0]
+    try:
+        response = requests.get(f"{OLLAMA_URL}/api/tags", timeout=10)
+        names = [m.get("name", "") for m in response.json().get("models", [])]
+    except Exception as e:
+        logger.warning(f"Liste des modèles indisponible : {e}")
+        return [base_model]
+    tags = sorted(name for name in names if name.split(":")[0] == family)
+    return tags or [base_model]
+
+def thread_candidates():
+    """None = choix d'Ollama, puis cœurs physiques et logiques."""
+    logical = os.cpu_count() or 1
+    try:
+        import psutil
+        physical = psutil.cpu_count(logical=False) or logical
+    except ImportError:
+        physical = max(1, logical // 2)
+    return [None] + sorted({physical, logical})
+
+def evaluate(profile, job_desc, references):
+    """Score le jeu de référence avec ce profil. Le chargement du modèle n'est pas compté."""
+    parallel = profile.get("num_parallel", 1)
+    loader = LLMAnalyzer().apply_profile(profile)
+    load_start = time.time()
+    loader.warm_up(loader.text_model)
+    load_seconds = time.time() - load_start
+
+    def run(index):
+        # Un analyseur par CV : last_metrics (eval_count) n'est pas partagé entre threads
+        name, text, _ = references[index]
+        return score_cv(text, job_desc, LLMAnalyzer().apply_profile(profile), file_name=name)
+
+    start = time.time()
+    with ThreadPoolExecutor(max_workers=parallel) as pool:
+        results = list(pool.map(run, range(len(references))))
+    elapsed = time.time() - start
+
+    errors = [abs(res.get("score_final", 0) - expected) for res, (_, _, expected) in zip(results, references)]
+    failures = sum(1 for res in results if str(res.get("nom", "")).startswith("Erreur"))
+    tokens = sum(res.get("eval_count", 0) for res in results)
+    return {
+        "cv_per_min": round(len(references) * 60 / elapsed, 2) if elapsed > 0 else 0.0,
+        "mae": round(sum(errors) / len(errors), 2) if errors else 0.0,
+        "failures": failures,
+        "tokens_per_s": round(tokens / elapsed, 1) if elapsed > 0 else 0.0,
+        "load_seconds": round(load_seconds, 2),
+    }
+
+def _acceptable(measured, max_mae):
+    return measured["failures"] == 0 and measured["mae"] <= max_mae
+
+def is_better(candidate, best, max_mae=MAX_MAE):
+    """Le plus rapide parmi les profils assez fidèles ; sinon le plus fidèle."""
+    if best is None:
+        return True
+    ok_candidate, ok_best = _acceptable(candidate, max_mae), _acceptable(best, max_mae)
+    if ok_candidate != ok_best:
+        return ok_candidate
+    if ok_candidate:
+        return candidate["cv_per_min"] > best["cv_per_min"]
+    return (candidate["failures"], candidate["mae"]) < (best["failures"], best["mae"])
+
+def _with_value(profile, dimension, value):
+    trial = json.loads(json.dumps(profile))
+    if dimension in ("text_model", "num_parallel"):
+        trial[dimension] = value
+    elif value is None:
+        trial["options"].pop(dimension, None)
+    else:
+        trial["options"][dimension] = value
+    return trial
+
+def tune(job_desc, references, models=None, max_mae=MAX_MAE, keep_alive=None, evaluate_fn=evaluate, on_trial=None):
+    """Descente par coordonnées : chaque dimension est balayée en gardant le meilleur
+    réglage des précédentes (grille complète trop longue avec un LLM local).
+    Renvoie (meilleur profil, liste des essais)."""
+    current = LLMAnalyzer()
+    best = {
+        "text_model": current.text_model,
+        "options": dict(current.options),
+        "keep_alive": keep_alive or current.keep_alive,
+        "num_parallel": 1,
+    }
+    dimensions = [
+        ("text_model", models or installed_tags(current.text_model)),
+        ("num_ctx", NUM_CTX_CANDIDATES),
+        ("num_predict", NUM_PREDICT_CANDIDATES),
+        ("num_thread", thread_candidates()),
+        ("num_parallel", PARALLEL_CANDIDATES),
+    ]
+    trials, seen = [], {}
+    best_measured = None
+    for dimension, values in dimensions:
+        reference_profile = best
+        for value in values:
+            trial = _with_value(reference_profile, dimension, value)
+            key = json.dumps(trial, sort_keys=True)
+            if key not in seen:
+                seen[key] = evaluate_fn(trial, job_desc, references)
+                trials.append((trial, seen[key]))
+                if on_trial:
+                    on_trial(trial, seen[key])
+            if is_better(seen[key], best_measured, max_mae):
+                best, best_measured = trial, seen[key]
+    best = dict(best, measured=best_measured, tuned_at=datetime.datetime.now().isoformat(timespec="seconds"))
+    return best, trials
+
+def _describe(profile):
+    options = profile["options"]
+    return (
+        f"{profile['text_model']:<32} ctx={options.get('num_ctx')} predict={options.get('num_predict')} "
+        f"threads={options.get('num_thread', 'auto')} parallel={profile['num_parallel']}"
+    )
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Calibre les options Ollama pour cette machine.")
+    parser.add_argument("reference_dir", help="Dossier : CV + job.txt + scores.json")
+    parser.add_argument("--models", help="Tags à comparer, séparés par des virgules (défaut : tags installés de la famille)")
+    parser.add_argument("--max-mae", type=float, default=MAX_MAE, help="Écart moyen toléré aux scores de référence")
+    parser.add_argument("--keep-alive", help="keep_alive à enregistrer (ex: 1h, 30m, -1)")
+    parser.add_argument("--host", default=None, help="Nom du profil (défaut : hostname ou HR_OLLAMA_HOST)")
+    parser.add_argument("--dry-run", action="store_true", help="Affiche le résultat sans écrire le profil")
+    args = parser.parse_args()
+
+    job, refs = load_reference_set(args.reference_dir)
+    print(f"🔬 {len(refs)} CV de référence • machine : {args.host or current_host()}")
+    profile, _ = tune(
+        job, refs,
+        models=args.models.split(",") if args.models else None,
+        max_mae=args.max_mae,
+        keep_alive=args.keep_alive,
+        on_trial=lambda p, m: print(f"   {_describe(p)}  {m['cv_per_min']:>6} CV/min  écart {m['mae']:>5}  échecs {m['failures']}"),
+    )
+    print(f"\n✅ Meilleur profil : {_describe(profile)}")
+    print(f"   {profile['measured']['cv_per_min']} CV/min, écart moyen {profile['measured']['mae']} pts, chargement {profile['measured']['load_seconds']}s")
+    if profile["num_parallel"] > 1:
+        print(f"⚙️  Lancez le serveur avec OLLAMA_NUM_PARALLEL={profile['num_parallel']} pour en profiter.")
+    if args.dry_run:
+        sys.exit(0)
+    print(f"💾 Profil enregistré dans {save_profile(profile, host=args.host)}")
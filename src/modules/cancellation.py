@@ -0,0 +1,129 @@
+"""
+Cancellation : jeton d'annulation par campagne
+Quand une campagne est remplacée (nouveau clic, nouvelle offre, onglet fermé),
+les générations en cours sont coupées et le travail en file est abandonné.
+"""
+import logging
+import threading
+import time
+
+logger = logging.getLogger(__name__)
+
+# Sessions sans nouvelle campagne ni génération depuis ce délai : retirées des registres
+SESSION_TTL_SECONDS = 6 * 3600
+
+class CampaignCancelled(Exception):
+    """Levée dans le thread de scoring quand la campagne a été annulée."""
+
+class CancelToken:
+    def __init__(self, session_id=None):
+        self.session_id = session_id
+        self.reason = None
+        self.aborted_generations = 0
+        self.aborted_elapsed = [] # secondes déjà passées sur chaque génération coupée
+        self.aborted_tokens = 0 # tokens générés pour rien
+        self.dropped_requests = 0 # requêtes jamais envoyées à Ollama
+        self._event = threading.Event()
+        self._lock = threading.Lock()
+        self._responses = set()
+        self.last_active_at = time.time()
+
+    @property
+    def cancelled(self):
+        return self._event.is_set()
+
+    def cancel(self, reason="superseded"):
+        """Annule la campagne et ferme les flux HTTP ouverts (Ollama arrête alors de générer)."""
+        with self._lock:
+            if self._event.is_set():
+                return
+            self.reason = reason
+            self._event.set()
+            responses = list(self._responses)
+        for response in responses:
+            try:
+                response.close()
+            except Exception:
+                pass
+        logger.info(f"Campagne {self.session_id} annulée ({reason}), {len(responses)} flux fermés")
+
+    def check(self):
+        if self.cancelled:
+            raise CampaignCancelled(self.reason)
+
+    def wait(self, timeout):
+        """Dort au plus timeout secondes ; True si la campagne a été annulée entre-temps."""
+        return self._event.wait(timeout)
+
+    def register(self, response):
+        with self._lock:
+            self._responses.add(response)
+            self.last_active_at = time.time()
+        # Annulation arrivée pendant l'ouverture de la connexion
+        if self.cancelled:
+            response.close()
+
+    def unregister(self, response):
+        with self._lock:
+            self._responses.discard(response)
+
+    def record_aborted(self, elapsed, tokens_generated):
+        with self._lock:
+            self.aborted_generations += 1
+            self.aborted_elapsed.append(elapsed)
+            self.aborted_tokens += tokens_generated
+
+    def record_dropped(self, count=1):
+        with self._lock:
+            self.dropped_requests += count
+
+    def reclaimed_seconds(self, avg_request_seconds):
+        """Temps de calcul économisé : fin des générations coupées + requêtes jamais lancées."""
+        with self._lock:
+            saved = sum(max(0.0, avg_request_seconds - e) for e in self.aborted_elapsed)
+            return round(saved + self.dropped_requests * avg_request_seconds, 1)
+
+# --- Registre process-wide : une campagne active par session ---
+_registry_lock = threading.Lock()
+_active_tokens = {}
+_cancelled_history = {}
+
+def new_campaign_token(session_id):
+    """Crée le jeton de la nouvelle campagne et annule la précédente de la session."""
+    token = CancelToken(session_id)
+    with _registry_lock:
+        _prune_sessions(token.last_active_at)
+        previous = _active_tokens.get(session_id)
+        _active_tokens[session_id] = token
+    if previous is not None and not previous.cancelled:
+        previous.cancel("superseded")
+    if previous is not None and previous.cancelled:
+        with _registry_lock:
+            _cancelled_history.setdefault(session_id, []).append(previous)
+    return token
+
+def _prune_sessions(now):
+    # Appelé sous _registry_lock : Streamlit ne signale pas la fermeture d'un onglet
+    for session_id, token in list(_active_tokens.items()):
+        if now - token.last_active_at > SESSION_TTL_SECONDS and not token._responses:
+            del _active_tokens[session_id]
+            _cancelled_history.pop(session_id, None)
+
+def cancelled_tokens(session_id):
+    with _registry_lock:
+        history = list(_cancelled_history.get(session_id, []))
+        current = _active_tokens.get(session_id)
+    if current is not None and current.cancelled and current not in history:
+        history.append(current)
+    return history
+
+def reclaimed_summary(session_id, avg_request_seconds):
+    """Cumul des économies de la session (pour l'affichage dans la sidebar)."""
+    tokens = cancelled_tokens(session_id)
+    return {
+        "campaigns_cancelled": len(tokens),
+        "aborted_generations": sum(t.aborted_generations for t in tokens),
+        "dropped_requests": sum(t.dropped_requests for t in tokens),
+        "aborted_tokens": sum(t.aborted_tokens for t in tokens),
+        "reclaimed_seconds": round(sum(t.reclaimed_seconds(avg_request_seconds) for t in tokens), 1),
+    }
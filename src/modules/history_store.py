@@ -0,0 +1,209 @@
+"""
+History Store : historique colonnaire de toutes les campagnes (Parquet)
+Ajout seulement, partitionné par date et par campagne :
+    data/history/date=2026-10-19/campaign=a1b2c3d4/part-<uuid>.parquet
+    data/history/manifest.jsonl   (1 ligne par fichier : rôle, date, max des sous-scores)
+Le manifeste élimine les fichiers hors sujet (rôle, période, seuils impossibles)
+avant toute lecture ; seules les colonnes demandées sont ensuite décodées.
+"""
+import datetime
+import json
+import logging
+import os
+import threading
+import uuid
+
+import pyarrow as pa
+import pyarrow.dataset as ds
+import pyarrow.parquet as pq
+
+from .scoring import SUBSCORES
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_HISTORY_DIR = os.getenv("HR_HISTORY_DIR", os.path.join("data", "history"))
+SUBSCORE_COLUMNS = [key for key, _ in SUBSCORES.values()]
+# Noms du JSON LLM ("n_hard_skills_coeur") -> colonnes stockées ("n_coeur")
+COLUMN_ALIASES = {llm_key: column for llm_key, (column, _) in SUBSCORES.items()}
+
+SCHEMA = pa.schema(
+    [
+        ("campaign_id", pa.string()),
+        ("scored_at", pa.timestamp("s")),
+        ("role", pa.string()),
+        ("job_hash", pa.string()),
+        ("nom", pa.string()),
+        ("email", pa.string()),
+        ("titre_profil", pa.string()),
+        ("file_name", pa.string()),
+        ("score_final", pa.int16()),
+    ]
+    + [(column, pa.int16()) for column in SUBSCORE_COLUMNS]
+    + [
+        ("competences", pa.list_(pa.string())),
+        ("annees_exp", pa.float32()),
+        ("model", pa.string()),
+        ("duration_s", pa.float32()),
+        ("eval_count", pa.int32()),
+        ("prompt_eval_count", pa.int32()),
+        ("text_hash", pa.string()),
+    ]
+)
+PARTITION_SCHEMA = pa.schema([("date", pa.date32()), ("campaign", pa.string())])
+PARTITIONING = ds.partitioning(PARTITION_SCHEMA, flavor="hive")
+DATASET_SCHEMA = pa.unify_schemas([SCHEMA, PARTITION_SCHEMA])
+MANIFEST_FILE = "manifest.jsonl"
+# Colonnes dont le max par fichier est gardé dans le manifeste (élagage des seuils)
+MAX_COLUMNS = ["score_final"] + SUBSCORE_COLUMNS
+
+def _as_int(value):
+    try:
+        return int(value)
+    except (TypeError, ValueError):
+        return 0
+
+def _as_float(value):
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return None
+
+def _as_list(value):
+    if isinstance(value, (list, tuple)):
+        return [str(v) for v in value]
+    return [s.strip() for s in str(value or "").split(",") if s.strip()]
+
+def _column_name(name) -> str:
+    column = COLUMN_ALIASES.get(name, name)
+    if column not in DATASET_SCHEMA.names:
+        raise ValueError(f"Colonne inconnue dans l'historique : {name!r} (colonnes : {', '.join(DATASET_SCHEMA.names)})")
+    return column
+
+def role_from_job_description(job_desc) -> str:
+    """Intitulé du poste = première ligne non vide de l'offre."""
+    for line in (job_desc or "").splitlines():
+        if line.strip():
+            return line.strip()[:120]
+    return ""
+
+class CampaignHistoryStore:
+    def __init__(self, root=DEFAULT_HISTORY_DIR):
+        self.root = root
+        self._lock = threading.Lock()
+        self._manifest = None # chargé une fois, puis complété à chaque append
+
+    def append(self, campaign_id, results, role="", job_hash="", scored_at=None):
+        """Écrit un nouveau fichier Parquet pour ces résultats (jamais de réécriture)."""
+        if not results:
+            return None
+        scored_at = scored_at or datetime.datetime.now()
+        rows = {name: [] for name in SCHEMA.names}
+        for res in results:
+            rows["campaign_id"].append(campaign_id)
+            rows["scored_at"].append(scored_at.replace(microsecond=0))
+            rows["role"].append(role)
+            rows["job_hash"].append(job_hash)
+            rows["nom"].append(str(res.get("nom", "")))
+            rows["email"].append(str(res.get("email", "") or ""))
+            rows["titre_profil"].append(str(res.get("titre_profil", "") or ""))
+            rows["file_name"].append(str(res.get("file_name", "") or ""))
+            rows["score_final"].append(_as_int(res.get("score_final")))
+            for column in SUBSCORE_COLUMNS:
+                rows[column].append(_as_int(res.get(column)))
+            rows["competences"].append(_as_list(res.get("compétences")))
+            rows["annees_exp"].append(_as_float(res.get("années_exp")))
+            rows["model"].append(str(res.get("model", "") or ""))
+            rows["duration_s"].append(_as_float(res.get("duration_s")))
+            rows["eval_count"].append(_as_int(res.get("eval_count")))
+            rows["prompt_eval_count"].append(_as_int(res.get("prompt_eval_count")))
+            rows["text_hash"].append(str(res.get("text_hash", "") or ""))
+        table = pa.Table.from_pydict(rows, schema=SCHEMA)
+
+        partition_dir = os.path.join(self.root, f"date={scored_at.date().isoformat()}", f"campaign={campaign_id}")
+        os.makedirs(partition_dir, exist_ok=True)
+        path = os.path.join(partition_dir, f"part-{uuid.uuid4().hex[:12]}.parquet")
+        pq.write_table(table, path, compression="zstd")
+
+        entry = {
+            "path": os.path.relpath(path, self.root),
+            "campaign_id": campaign_id,
+            "date": scored_at.date().isoformat(),
+            "role": role,
+            "rows": table.num_rows,
+            "max": {column: max(rows[column]) for column in MAX_COLUMNS},
+        }
+        with self._lock:
+            # Le fichier Parquet est complet avant d'être référencé : un lecteur ne voit jamais de fichier partiel
+            with open(os.path.join(self.root, MANIFEST_FILE), "a", encoding="utf-8") as f:
+                f.write(json.dumps(entry, ensure_ascii=False) + "\n")
+            if self._manifest is not None:
+                self._manifest.append(entry)
+        logger.info(f"Historique : {len(results)} candidats ajoutés ({path})")
+        return path
+
+    def _get_manifest(self):
+        with self._lock:
+            if self._manifest is None:
+                manifest_path = os.path.join(self.root, MANIFEST_FILE)
+                entries = []
+                if os.path.exists(manifest_path):
+                    with open(manifest_path, encoding="utf-8") as f:
+                        entries = [json.loads(line) for line in f if line.strip()]
+                self._manifest = entries
+            return list(self._manifest)
+
+    def _select_files(self, min_scores, role, since_date, campaign_id):
+        role = (role or "").lower()
+        selected = []
+        for entry in self._get_manifest():
+            if since_date is not None and entry["date"] < since_date.isoformat():
+                continue
+            if campaign_id is not None and entry["campaign_id"] != campaign_id:
+                continue
+            if role and role not in entry["role"].lower():
+                continue
+            maxima = entry.get("max", {})
+            if any(column in maxima and maxima[column] < threshold for column, threshold in min_scores.items()):
+                continue
+            selected.append(os.path.join(self.root, entry["path"]))
+        return selected
+
+    def query(self, min_scores=None, role=None, since=None, campaign_id=None, columns=None, where=None):
+        """Recherche inter-campagnes, renvoie un DataFrame pandas.
+
+        min_scores : {"n_coeur": 50, "score_final": 70} (seuils inclusifs ; les noms du JSON LLM
+                     comme "n_hard_skills_coeur" sont acceptés, une colonne inconnue lève ValueError)
+        role       : sous-chaîne de l'intitulé du poste, insensible à la casse ("Data")
+        since      : datetime.date, datetime.datetime ou timedelta (ex: timedelta(days=183))
+        where      : expression pyarrow.compute supplémentaire
+        """
+        min_scores = {_column_name(column): threshold for column, threshold in (min_scores or {}).items()}
+        if columns is not None:
+            columns = [_column_name(column) for column in columns]
+        since_date = None
+        if since is not None:
+            if isinstance(since, datetime.timedelta):
+                since = datetime.datetime.now() - since
+            since_date = since.date() if isinstance(since, datetime.datetime) else since
+
+        # Rôle, période et campagne sont constants par fichier : réglés par le manifeste
+        files = self._select_files(min_scores, role, since_date, campaign_id)
+        if not files:
+            return DATASET_SCHEMA.empty_table().select(columns or DATASET_SCHEMA.names).to_pandas()
+        dataset = ds.dataset(files, format="parquet", schema=DATASET_SCHEMA, partitioning=PARTITIONING, partition_base_dir=self.root)
+
+        conditions = [ds.field(column) >= threshold for column, threshold in min_scores.items()]
+        if where is not None:
+            conditions.append(where)
+        expression = None
+        for condition in conditions:
+            expression = condition if expression is None else expression & condition
+        return dataset.to_table(columns=columns, filter=expression).to_pandas()
+
+    def campaigns(self):
+        """Liste (date, campaign_id, nombre de candidats) de toutes les campagnes."""
+        counts = {}
+        for entry in self._get_manifest():
+            key = (datetime.date.fromisoformat(entry["date"]), entry["campaign_id"])
+            counts[key] = counts.get(key, 0) + entry["rows"]
+        return sorted((date, campaign_id, rows) for (date, campaign_id), rows in counts.items())
@@ -0,0 +1,130 @@
+"""
+Ingestion Module : lecture en streaming des exports candidats (XLSX / CSV)
+Le classeur n'est jamais chargé en entier : les lignes arrivent par paquets de
+taille fixe et chaque paquet part directement au KPICalculator.
+Usage : python -m src.modules.ingestion data/candidats_100_random.xlsx
+"""
+import heapq
+import logging
+import os
+import sys
+
+import pandas as pd
+
+from .kpi_calculator import KPICalculator, StatsAccumulator
+
+logger = logging.getLogger(__name__)
+
+CONFIG_SHEET = "_CONFIG"
+DEFAULT_WORKSHEET = "Candidats"
+DEFAULT_CHUNK_SIZE = 5000
+DEFAULT_TOP_N = 50
+
+def _is_excel(path):
+    return os.path.splitext(str(path))[1].lower() in (".xlsx", ".xlsm")
+
+def _parse_config_value(key, value):
+    if key == "required_skills":
+        return [s.strip() for s in str(value or "").split(",") if s.strip()]
+    if key == "min_years_exp":
+        try:
+            return float(value)
+        except (TypeError, ValueError):
+            return 0.0
+    return str(value).strip() if value is not None else ""
+
+def read_sheet_config(path) -> dict:
+    """Lit l'onglet _CONFIG (clé | valeur, sans en-tête). {} pour un CSV ou sans onglet."""
+    if not _is_excel(path):
+        return {}
+    import openpyxl
+    workbook = openpyxl.load_workbook(path, read_only=True, data_only=True)
+    try:
+        if CONFIG_SHEET not in workbook.sheetnames:
+            return {}
+        config = {}
+        for row in workbook[CONFIG_SHEET].iter_rows(min_col=1, max_col=2, values_only=True):
+            key, value = (row + (None, None))[:2]
+            if key:
+                key = str(key).strip()
+                config[key] = _parse_config_value(key, value)
+        return config
+    finally:
+        workbook.close()
+
+def iter_candidate_chunks(path, chunk_size=DEFAULT_CHUNK_SIZE, worksheet=None):
+    """Générateur de DataFrames d'au plus chunk_size lignes."""
+    if not _is_excel(path):
+        # dtype=str : les pièges de l'ATS ("dix ans", "N/A") restent du texte brut
+        yield from pd.read_csv(path, chunksize=chunk_size, dtype=str, keep_default_na=False)
+        return
+
+    import openpyxl
+    # read_only : openpyxl lit le XML au fil de l'eau au lieu de construire tout le classeur
+    workbook = openpyxl.load_workbook(path, read_only=True, data_only=True)
+    try:
+        sheet = workbook[worksheet or DEFAULT_WORKSHEET]
+        rows = sheet.iter_rows(values_only=True)
+        header = next(rows, None)
+        if header is None:
+            return
+        columns = [str(c).strip() if c is not None else f"col_{i}" for i, c in enumerate(header)]
+        buffer = []
+        for row in rows:
+            if not any(v is not None for v in row):
+                continue
+            buffer.append(row)
+            if len(buffer) >= chunk_size:
+                yield pd.DataFrame.from_records(buffer, columns=columns)
+                buffer = []
+        if buffer:
+            yield pd.DataFrame.from_records(buffer, columns=columns)
+    finally:
+        workbook.close()
+
+def ingest_candidates(path, chunk_size=DEFAULT_CHUNK_SIZE, top_n=DEFAULT_TOP_N, config=None, on_chunk=None):
+    """Pipeline complet : _CONFIG -> chunks -> scoring.
+    Seuls le top_n et des agrégats sont gardés en mémoire.
+    on_chunk(rows_done) est appelé après chaque paquet.
+
+    Renvoie (top candidats triés, statistiques, config effective)."""
+    effective_config = read_sheet_config(path)
+    effective_config.update(config or {})
+    calculator = KPICalculator(
+        required_skills=effective_config.get("required_skills"),
+        min_years_exp=effective_config.get("min_years_exp", 0),
+    )
+    worksheet = effective_config.get("worksheet_target") or DEFAULT_WORKSHEET
+
+    stats = StatsAccumulator()
+    top = [] # min-heap de (score, rang d'arrivée, metrics)
+    rows_done = 0
+    for chunk in iter_candidate_chunks(path, chunk_size=chunk_size, worksheet=worksheet):
+        for metrics in calculator.calculate_metrics(chunk):
+            stats.add(metrics)
+            entry = (metrics.overall_rank_score, -rows_done, metrics)
+            rows_done += 1
+            if len(top) < top_n:
+                heapq.heappush(top, entry)
+            elif entry[:2] > top[0][:2]:
+                heapq.heapreplace(top, entry)
+        if on_chunk:
+            on_chunk(rows_done)
+        logger.debug(f"Ingestion {path}: {rows_done} lignes")
+
+    ranked = [metrics for _, _, metrics in sorted(top, key=lambda e: e[:2], reverse=True)]
+    return ranked, stats.summary(), effective_config
+
+if __name__ == "__main__":
+    if len(sys.argv) < 2:
+        print("Usage : python -m src.modules.ingestion <fichier.xlsx|fichier.csv> [taille_chunk]")
+        sys.exit(1)
+    source = sys.argv[1]
+    size = int(sys.argv[2]) if len(sys.argv) > 2 else DEFAULT_CHUNK_SIZE
+    top_candidates, summary, used_config = ingest_candidates(
+        source, chunk_size=size, on_chunk=lambda n: print(f"   ... {n} lignes traitées", end="\r")
+    )
+    print(f"\n✅ {summary.get('total_candidates', 0)} candidats analysés ({source})")
+    print(f"⚙️  Config : {used_config}")
+    for rank, metrics in enumerate(top_candidates[:10], start=1):
+        print(f"   {rank:>2}. {metrics.name:<25} {metrics.overall_rank_score:>5}/100  {metrics.rank_tier}")
@@ -0,0 +1,195 @@
+"""
+KPI Calculator : notation déterministe des lignes candidats (export tableur / ATS)
+Expérience, correspondance des compétences, disponibilité -> score global et tier.
+"""
+import datetime
+import logging
+import re
+from dataclasses import dataclass, asdict
+
+import pandas as pd
+
+logger = logging.getLogger(__name__)
+
+# Pondération du score global (somme = 1)
+WEIGHT_SKILLS = 0.5
+WEIGHT_EXPERIENCE = 0.3
+WEIGHT_AVAILABILITY = 0.2
+
+# Disponibilité inconnue ou illisible ("Hier", vide...) : préavis standard
+DEFAULT_AVAILABILITY_DAYS = 30
+IMMEDIATE_WORDS = ("immédiat", "immediat", "immediate", "asap", "now")
+DURATION_UNITS = {"jour": 1, "day": 1, "semaine": 7, "week": 7, "mois": 30, "month": 30}
+
+_NUMBER_RE = re.compile(r"\d+(?:[.,]\d+)?")
+# Années d'expérience : le signe compte (le CSV garde "-5" en texte, l'XLSX le lit en nombre)
+_YEARS_RE = re.compile(r"-?\d+(?:[.,]\d+)?")
+
+def _text(value) -> str:
+    if value is None or (isinstance(value, float) and pd.isna(value)):
+        return ""
+    return str(value).strip()
+
+@dataclass
+class CandidateMetrics:
+    name: str
+    email: str
+    years_experience: float
+    experience_score: float
+    skill_match_count: int
+    match_percentage: float
+    availability_days: int
+    overall_rank_score: float
+    rank_tier: str
+
+    def to_dict(self):
+        return asdict(self)
+
+class StatsAccumulator:
+    """Statistiques agrégées calculées au fil de l'eau (mémoire constante)."""
+
+    def __init__(self):
+        self.total = 0
+        self.available_now = 0
+        self.sum_match = 0.0
+        self.sum_years = 0.0
+        self.tiers = {"EXCELLENT": 0, "GOOD": 0, "AVERAGE": 0, "WEAK": 0}
+
+    def add(self, metrics):
+        self.total += 1
+        self.available_now += metrics.availability_days == 0
+        self.sum_match += metrics.match_percentage
+        self.sum_years += metrics.years_experience
+        self.tiers[metrics.rank_tier] += 1
+
+    def summary(self):
+        if not self.total:
+            return {}
+        return {
+            "total_candidates": self.total,
+            "candidates_immediately_available": self.available_now,
+            "average_match_percentage": round(self.sum_match / self.total, 1),
+            "average_years_experience": round(self.sum_years / self.total, 1),
+            "tier_distribution": dict(self.tiers),
+        }
+
+class KPICalculator:
+    def __init__(self, required_skills=None, min_years_exp=0):
+        self.required_skills = [s.strip().lower() for s in (required_skills or []) if s and s.strip()]
+        self.min_years_exp = float(min_years_exp or 0)
+        self.today = datetime.date.today()
+
+    def _parse_years_experience(self, value) -> float:
+        """'5', '5 ans', '5-7 years', 0.5 -> nombre d'années (0 si illisible ou négatif)."""
+        if value is None or (isinstance(value, float) and pd.isna(value)):
+            return 0.0
+        if isinstance(value, (int, float)):
+            return max(0.0, float(value))
+        match = _YEARS_RE.search(str(value))
+        if not match:
+            return 0.0
+        return max(0.0, float(match.group(0).replace(",", ".")))
+
+    def _calculate_experience_score(self, years) -> float:
+        if years <= 0:
+            return 0.0
+        if years < 1:
+            return 20.0
+        if years < 2:
+            return 40.0
+        if years < 5:
+            return 65.0
+        if years < 10:
+            return 85.0
+        return 100.0
+
+    def _calculate_skill_match(self, skills):
+        """Renvoie (nombre de compétences requises trouvées, pourcentage)."""
+        if not self.required_skills:
+            return 0, 0.0
+        if isinstance(skills, (list, tuple)):
+            candidate_skills = {str(s).strip().lower() for s in skills}
+        else:
+            candidate_skills = {s.strip().lower() for s in str(skills or "").split(",")}
+        matched = sum(1 for skill in self.required_skills if skill in candidate_skills)
+        return matched, matched / len(self.required_skills) * 100
+
+    def _parse_availability_days(self, value) -> int:
+        if isinstance(value, (datetime.datetime, datetime.date)):
+            date = value.date() if isinstance(value, datetime.datetime) else value
+            return max(0, (date - self.today).days)
+        text = str(value or "").strip().lower()
+        if not text or text in ("nan", "none"):
+            return DEFAULT_AVAILABILITY_DAYS
+        if any(word in text for word in IMMEDIATE_WORDS):
+            return 0
+        try:
+            date = datetime.date.fromisoformat(text[:10])
+            return max(0, (date - self.today).days)
+        except ValueError:
+            pass
+        number = _NUMBER_RE.search(text)
+        for unit, days in DURATION_UNITS.items():
+            if number and unit in text:
+                return int(float(number.group(0).replace(",", ".")) * days)
+        return DEFAULT_AVAILABILITY_DAYS
+
+    def _calculate_availability_score(self, days) -> float:
+        if days == 0:
+            return 100.0
+        if days <= 30:
+            return 70.0
+        if days <= 60:
+            return 50.0
+        if days <= 90:
+            return 30.0
+        return 10.0
+
+    def _get_rank_tier(self, score) -> str:
+        if score >= 80:
+            return "EXCELLENT"
+        if score >= 60:
+            return "GOOD"
+        if score >= 40:
+            return "AVERAGE"
+        return "WEAK"
+
+    def calculate_candidate(self, row) -> CandidateMetrics:
+        years = self._parse_years_experience(row.get("années_exp"))
+        experience_score = self._calculate_experience_score(years)
+        if self.min_years_exp and years < self.min_years_exp:
+            # Sous le minimum demandé dans _CONFIG : jamais mieux que "junior"
+            experience_score = min(experience_score, 40.0)
+        matched, match_pct = self._calculate_skill_match(row.get("compétences"))
+        days = self._parse_availability_days(row.get("disponibilité"))
+        overall = (
+            WEIGHT_SKILLS * match_pct
+            + WEIGHT_EXPERIENCE * experience_score
+            + WEIGHT_AVAILABILITY * self._calculate_availability_score(days)
+        )
+        return CandidateMetrics(
+            name=_text(row.get("nom")) or "Anonyme",
+            email=_text(row.get("email")),
+            years_experience=years,
+            experience_score=experience_score,
+            skill_match_count=matched,
+            match_percentage=match_pct,
+            availability_days=days,
+            overall_rank_score=round(overall, 1),
+            rank_tier=self._get_rank_tier(overall),
+        )
+
+    def calculate_metrics(self, df):
+        """Note chaque ligne du DataFrame, sans tri (utilisé chunk par chunk)."""
+        if df is None or df.empty:
+            return []
+        return [self.calculate_candidate(row) for row in df.to_dict("records")]
+
+    def calculate_all_metrics(self, df):
+        """Renvoie (liste triée par score décroissant, statistiques agrégées)."""
+        metrics_list = self.calculate_metrics(df)
+        stats = StatsAccumulator()
+        for metrics in metrics_list:
+            stats.add(metrics)
+        metrics_list.sort(key=lambda m: m.overall_rank_score, reverse=True)
+        return metrics_list, stats.summary()
@@ -5,23 +5,73 @@ Version Optimisée pour la vitesse (CPU-friendly)
 
 import json
 import logging
+import os
+import threading
+import time
 import requests
 import base64
+from contextlib import contextmanager, nullcontext
 from io import BytesIO
 import streamlit as st
 
+from .cancellation import CampaignCancelled
+from .ollama_profile import load_profile
+
 logger = logging.getLogger(__name__)
 
+OLLAMA_URL = os.getenv("OLLAMA_URL", "http://localhost:11434")
+
+# Options partagées par la génération ET le warm-up : un num_ctx différent
+# force Ollama à recharger le modèle, ce qui annulerait le préchargement.
+DEFAULT_OPTIONS = {
+    "temperature": 0.0,
+    "num_ctx": 4096,
+    "num_predict": 1000 # ⚡ Coupe l'IA si elle parle trop (gain de temps)
+}
+DEFAULT_KEEP_ALIVE = "1h"
+PINNED_KEEP_ALIVE = -1 # -1 = jamais déchargé tant qu'on ne le demande pas
+PROGRESS_INTERVAL = 0.5 # secondes entre deux appels à on_progress pendant le streaming
+# Options qui fixent la façon dont le modèle est chargé : le warm-up doit envoyer les mêmes
+LOAD_OPTIONS = ("num_ctx", "num_thread")
+
 class ResponseWrapper:
     def __init__(self, text):
         self.text = text
 
 class LLMAnalyzer:
     def __init__(self):
-        self.api_url = "http://localhost:11434/api/generate"
+        self.api_url = f"{OLLAMA_URL}/api/generate"
         self.vision_model = "llava"   # Pour les images
         # ⚡ CHANGEMENT MAJEUR : llama3.2 (3B) est 3x plus rapide que llama3 (8B)
         self.text_model = "llama3.2"  
+        self.options = dict(DEFAULT_OPTIONS)
+        self.keep_alive = DEFAULT_KEEP_ALIVE
+        # Réglages mesurés sur cette machine (python -m src.modules.autotune)
+        profile = load_profile()
+        if profile:
+            self.apply_profile(profile)
+        # File d'attente partagée (optionnelle) : voir attach_scheduler
+        self.scheduler = None
+        self.session_id = None
+        self.on_wait = None
+        # Annulation de campagne (voir cancellation.py) et suivi du streaming
+        self.cancel_token = None
+        self.on_progress = None
+        self.last_metrics = {}
+
+    def apply_profile(self, profile):
+        """Applique un profil d'autotune : modèle texte, options Ollama, keep_alive."""
+        self.text_model = profile.get("text_model") or self.text_model
+        self.options = {**DEFAULT_OPTIONS, **profile.get("options", {})}
+        self.keep_alive = profile.get("keep_alive", self.keep_alive)
+        return self
+
+    def attach_scheduler(self, scheduler, session_id, on_wait=None):
+        """Fait passer chaque génération par la file d'attente commune aux sessions."""
+        self.scheduler = scheduler
+        self.session_id = session_id
+        self.on_wait = on_wait
+        return self
 
     def generate_content(self, inputs):
         """Aiguillage intelligent : Texte -> Llama3.2, Image -> LLaVA"""
@@ -49,31 +99,105 @@ class LLMAnalyzer:
         payload = {
             "model": selected_model,
             "prompt": prompt,
-            "stream": False,
+            "stream": True, # Streaming : le flux peut être coupé dès que la campagne est annulée
             "format": "json",
-            "keep_alive": "1h", # ⚡ Garde le modèle en mémoire (évite le rechargement lent)
+            "keep_alive": _effective_keep_alive(self.keep_alive), # ⚡ Garde le modèle en mémoire (évite le rechargement lent)
             "images": images,
-            "options": {
-                "temperature": 0.0,
-                "num_ctx": 4096,
-                "num_predict": 1000 # ⚡ Coupe l'IA si elle parle trop (gain de temps)
-            }
+            "options": dict(self.options)
         }
 
+        if self.scheduler is not None:
+            slot = self.scheduler.slot(self.session_id, on_wait=self.on_wait, cancel_token=self.cancel_token)
+        else:
+            slot = nullcontext()
+
         try:
-            # On laisse un timeout large au cas où le premier chargement soit long
-            response = requests.post(self.api_url, json=payload, timeout=300) 
-            
-            if response.status_code == 200:
-                json_resp = response.json()
-                return ResponseWrapper(json_resp.get("response", ""))
-            else:
-                return ResponseWrapper(f'{{"error": "Erreur Ollama {response.status_code}"}}')
+            with slot:
+                return self._post_streaming(payload)
 
+        except CampaignCancelled:
+            raise
         except Exception as e:
+            if self.cancel_token is not None and self.cancel_token.cancelled:
+                # Flux fermé par cancel() depuis un autre thread
+                raise CampaignCancelled(self.cancel_token.reason)
             st.toast(f"🚨 Vérifiez que 'ollama run {selected_model}' a été fait !", icon="🛑")
             return ResponseWrapper('{"nom": "Erreur Connexion", "reasoning": "Modèle introuvable ?", "score": 0}')
 
+    def _post_streaming(self, payload):
+        """Lit la réponse token par token : le jeton d'annulation est vérifié à chaque morceau."""
+        token = self.cancel_token
+        if token is not None:
+            token.check()
+        self.last_metrics = {}
+        chunks = []
+        completed = False
+        started = last_progress = time.time()
+        # Les modèles sont préchargés au lancement (warm_up), mais on garde
+        # un timeout large si le warm-up n'a pas encore terminé
+        response = requests.post(self.api_url, json=payload, stream=True, timeout=300)
+        if token is not None:
+            token.register(response)
+        try:
+            if response.status_code != 200:
+                completed = True
+                return ResponseWrapper(f'{{"error": "Erreur Ollama {response.status_code}"}}')
+            for line in response.iter_lines(chunk_size=None):
+                if token is not None:
+                    token.check()
+                if not line:
+                    continue
+                part = json.loads(line)
+                chunks.append(part.get("response", ""))
+                if part.get("done"):
+                    # Métriques Ollama (durées en nanosecondes, nombre de tokens)
+                    self.last_metrics = {k: v for k, v in part.items() if k.endswith(("_count", "_duration"))}
+                    break
+                if self.on_progress and time.time() - last_progress >= PROGRESS_INTERVAL:
+                    last_progress = time.time()
+                    self.on_progress(len(chunks))
+            if token is not None:
+                token.check()
+            completed = True
+            return ResponseWrapper("".join(chunks))
+        finally:
+            if token is not None:
+                token.unregister(response)
+                if not completed:
+                    token.record_aborted(time.time() - started, len(chunks))
+            response.close()
+
+    def warm_up(self, model, keep_alive=None, timeout=300):
+        """Charge un modèle en mémoire sans rien générer (prompt vide).
+        Utilise les mêmes num_ctx / num_thread que generate_content pour éviter un rechargement."""
+        payload = {
+            "model": model,
+            "prompt": "",
+            "stream": False,
+            "keep_alive": keep_alive if keep_alive is not None else _effective_keep_alive(self.keep_alive),
+            "options": {k: self.options[k] for k in LOAD_OPTIONS if k in self.options}
+        }
+        try:
+            response = requests.post(self.api_url, json=payload, timeout=timeout)
+            return response.status_code == 200
+        except Exception as e:
+            logger.warning(f"Warm-up impossible pour {model}: {e}")
+            return False
+
+    def loaded_models(self):
+        """Noms des modèles actuellement chargés par Ollama (/api/ps)."""
+        try:
+            response = requests.get(f"{OLLAMA_URL}/api/ps", timeout=5)
+            if response.status_code != 200:
+                return set()
+            return {m.get("name", "") for m in response.json().get("models", [])}
+        except Exception:
+            return set()
+
+    @property
+    def models(self):
+        return [self.text_model, self.vision_model]
+
     def _image_to_base64(self, image):
         try:
             buf = BytesIO()
@@ -87,5 +211,48 @@ class LLMAnalyzer:
     @property
     def client(self): return self
 
+# --- Épinglage des modèles pendant une campagne ---
+# Compteur process-wide : plusieurs sessions Streamlit peuvent avoir une
+# campagne en cours en même temps, on ne relâche qu'à la dernière.
+_pin_lock = threading.Lock()
+_pin_count = 0
+
+def _effective_keep_alive(keep_alive):
+    return PINNED_KEEP_ALIVE if _pin_count > 0 else keep_alive
+
+@contextmanager
+def pinned_models(analyzer=None):
+    """Garde les modèles chargés (keep_alive=-1) pendant toute une campagne."""
+    global _pin_count
+    analyzer = analyzer or create_analyzer()
+    with _pin_lock:
+        _pin_count += 1
+        first = _pin_count == 1
+    if first:
+        # Le modèle texte est forcément utilisé : on le fixe tout de suite.
+        # LLaVA est épinglé à sa première utilisation via generate_content.
+        analyzer.warm_up(analyzer.text_model, keep_alive=PINNED_KEEP_ALIVE)
+    try:
+        yield analyzer
+    finally:
+        with _pin_lock:
+            _pin_count -= 1
+            last = _pin_count == 0
+        if last:
+            # Retour au keep_alive normal : le minuteur repart de zéro
+            for model in analyzer.loaded_models() & set(_with_tags(analyzer.models)):
+                analyzer.warm_up(model, keep_alive=analyzer.keep_alive, timeout=30)
+
+def _with_tags(models):
+    """/api/ps renvoie 'llama3.2:latest' : on accepte les deux écritures."""
+    names = set()
+    for m in models:
+        names.add(m)
+        if ":" not in m:
+            names.add(f"{m}:latest")
+    return names
+
 def create_analyzer():
-    return LLMAnalyzer()
\ No newline at end of file
+    # HR_LLM_MODE=record|replay : cassette de réponses au lieu d'Ollama en direct (voir llm_cassette.py)
+    from .llm_cassette import analyzer_from_env
+    return analyzer_from_env() or LLMAnalyzer()
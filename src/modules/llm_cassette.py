@@ -0,0 +1,212 @@
+"""
+LLM Cassette : enregistrement / rejeu des réponses Ollama
+Enregistrement : chaque génération (prompt haché, réponse, métriques Ollama, durée
+réelle) est ajoutée à une cassette jsonl.gz compacte.
+Rejeu : les réponses sont servies sans Ollama, instantanément ou avec les latences
+enregistrées ; tout l'aval (extraction JSON, barème, tri, rapport) tourne sur n'importe quelle CI.
+
+Activation dans l'app : HR_LLM_MODE=record|replay, HR_LLM_CASSETTE=<fichier>,
+HR_LLM_REPLAY_LATENCY=1 pour rejouer en temps réel (0 = instantané).
+Usage : python -m src.modules.llm_cassette record|bench <cassette> <dossier: job.txt + CV> [--repeat 100]
+"""
+import argparse
+import gzip
+import hashlib
+import json
+import logging
+import os
+import sys
+import threading
+import time
+
+from .cancellation import CampaignCancelled
+from .llm_analyzer import LLMAnalyzer, ResponseWrapper
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_CASSETTE = os.getenv("HR_LLM_CASSETTE", os.path.join("data", "cassettes", "llm.jsonl.gz"))
+RECORD = "record"
+REPLAY = "replay"
+
+def request_key(payload) -> str:
+    """Empreinte d'une requête : prompt + images. Le modèle et les options n'en font pas
+    partie, pour rejouer une cassette sur une machine au profil d'autotune différent."""
+    content = json.dumps([payload.get("prompt", ""), payload.get("images") or []], ensure_ascii=False)
+    return hashlib.sha256(content.encode("utf-8")).hexdigest()[:24]
+
+class Cassette:
+    """Réponses indexées par empreinte de requête. Ajout seulement (membres gzip concaténés)."""
+
+    def __init__(self, path=DEFAULT_CASSETTE):
+        self.path = path
+        self.entries = {}
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        if os.path.exists(path):
+            with gzip.open(path, "rt", encoding="utf-8") as f:
+                for line in f:
+                    if line.strip():
+                        entry = json.loads(line)
+                        self.entries[entry["key"]] = entry
+
+    def record(self, payload, text, metrics, elapsed):
+        entry = {
+            "key": request_key(payload),
+            "model": payload.get("model", ""),
+            "response": text,
+            "metrics": metrics,
+            "elapsed_s": round(elapsed, 3),
+        }
+        with self._lock:
+            os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+            with gzip.open(self.path, "at", encoding="utf-8") as f:
+                f.write(json.dumps(entry, ensure_ascii=False) + "\n")
+            self.entries[entry["key"]] = entry
+        return entry
+
+    def lookup(self, payload):
+        with self._lock:
+            entry = self.entries.get(request_key(payload))
+            if entry is None:
+                self.misses += 1
+            else:
+                self.hits += 1
+            return entry
+
+    def __len__(self):
+        return len(self.entries)
+
+_cassettes = {}
+_cassettes_lock = threading.Lock()
+
+def get_cassette(path=None):
+    """Une seule instance par fichier dans le process (partagée par toutes les sessions)."""
+    path = os.path.abspath(path or DEFAULT_CASSETTE)
+    with _cassettes_lock:
+        if path not in _cassettes:
+            _cassettes[path] = Cassette(path)
+        return _cassettes[path]
+
+class RecordingAnalyzer(LLMAnalyzer):
+    """LLMAnalyzer normal, qui garde une copie de chaque réponse complète dans la cassette."""
+
+    def __init__(self, cassette=None):
+        super().__init__()
+        self.cassette = cassette if cassette is not None else get_cassette()
+
+    def _post_streaming(self, payload):
+        start = time.time()
+        response = super()._post_streaming(payload)
+        if self.last_metrics: # Réponse Ollama complète (pas d'erreur HTTP)
+            self.cassette.record(payload, response.text, self.last_metrics, time.time() - start)
+        return response
+
+class ReplayAnalyzer(LLMAnalyzer):
+    """Sert les réponses de la cassette, sans réseau.
+    latency_scale : 0 = instantané, 1 = latences enregistrées, 0.1 = dix fois plus vite."""
+
+    def __init__(self, cassette=None, latency_scale=0.0):
+        super().__init__()
+        self.cassette = cassette if cassette is not None else get_cassette()
+        self.latency_scale = latency_scale
+
+    def _post_streaming(self, payload):
+        token = self.cancel_token
+        if token is not None:
+            token.check()
+        entry = self.cassette.lookup(payload)
+        if entry is None:
+            # Même chemin qu'une erreur Ollama : generate_content renvoie une réponse d'erreur
+            raise KeyError(f"Requête absente de la cassette {self.cassette.path}")
+        if self.latency_scale:
+            delay = entry["elapsed_s"] * self.latency_scale
+            if token is None:
+                time.sleep(delay)
+            elif token.wait(delay): # Attente interruptible par une annulation de campagne
+                raise CampaignCancelled(token.reason)
+        self.last_metrics = dict(entry["metrics"])
+        return ResponseWrapper(entry["response"])
+
+    def warm_up(self, model, keep_alive=None, timeout=300):
+        return True
+
+    def loaded_models(self):
+        return set(self.models)
+
+def analyzer_from_env():
+    """LLMAnalyzer selon HR_LLM_MODE (None = Ollama en direct)."""
+    mode = os.getenv("HR_LLM_MODE", "").lower()
+    if mode == RECORD:
+        return RecordingAnalyzer()
+    if mode == REPLAY:
+        return ReplayAnalyzer(latency_scale=float(os.getenv("HR_LLM_REPLAY_LATENCY", "0") or 0))
+    return None
+
+def _load_cv_dir(directory):
+    from .pdf_utils import extract_text_from_pdf
+    with open(os.path.join(directory, "job.txt"), encoding="utf-8") as f:
+        job_desc = f.read()
+    candidates = []
+    for name in sorted(os.listdir(directory)):
+        path = os.path.join(directory, name)
+        if name.lower().endswith(".pdf"):
+            with open(path, "rb") as f:
+                candidates.append((name, extract_text_from_pdf(f)))
+        elif name.lower().endswith(".txt") and name != "job.txt":
+            with open(path, encoding="utf-8") as f:
+                candidates.append((name, f.read()))
+    return job_desc, candidates
+
+def benchmark(cassette, job_desc, candidates, repeat=1, latency_scale=0.0):
+    """Chaîne complète hors LLM : score_cv (JSON + barème) -> tri -> rapport HTML.
+    Renvoie les durées par étape (s) et le débit en CV/s."""
+    from .report_renderer import render_report_html
+    from .scoring import score_cv
+    llm = ReplayAnalyzer(cassette, latency_scale=latency_scale)
+    start = time.perf_counter()
+    results = [score_cv(text, job_desc, llm, file_name=name) for _ in range(repeat) for name, text in candidates]
+    scored = time.perf_counter()
+    ranked = sorted(results, key=lambda r: r.get("score_final", 0), reverse=True)
+    sorted_at = time.perf_counter()
+    page = render_report_html(ranked)
+    rendered = time.perf_counter()
+    return {
+        "cvs": len(results),
+        "scoring_s": round(scored - start, 4),
+        "sorting_s": round(sorted_at - scored, 4),
+        "report_s": round(rendered - sorted_at, 4),
+        "cv_per_s": round(len(results) / (rendered - start), 1) if rendered > start else 0.0,
+        "report_kb": len(page.encode("utf-8")) // 1024,
+        "misses": cassette.misses,
+        "top": [(r.get("nom", ""), r.get("score_final", 0)) for r in ranked[:5]],
+    }
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Enregistre ou rejoue les réponses Ollama d'un dossier de CV.")
+    parser.add_argument("mode", choices=[RECORD, "bench"])
+    parser.add_argument("cassette")
+    parser.add_argument("cv_dir", help="Dossier : job.txt + CV (.pdf ou .txt)")
+    parser.add_argument("--repeat", type=int, default=100, help="Passages sur le dossier en mode bench")
+    parser.add_argument("--latency", type=float, default=0.0, help="Facteur de latence au rejeu (1 = temps réel)")
+    args = parser.parse_args()
+
+    job, cvs = _load_cv_dir(args.cv_dir)
+    tape = Cassette(args.cassette)
+    if args.mode == RECORD:
+        from .scoring import score_cv
+        recorder = RecordingAnalyzer(tape)
+        for cv_name, cv_text in cvs:
+            score_cv(cv_text, job, recorder, file_name=cv_name)
+            print(f"   🎙️ {cv_name}", end="\r")
+        print(f"\n✅ {len(tape)} réponses dans {args.cassette} ({os.path.getsize(args.cassette) // 1024} Ko)")
+        sys.exit(0)
+
+    stats = benchmark(tape, job, cvs, repeat=args.repeat, latency_scale=args.latency)
+    print(f"⚡ {stats['cvs']} CV rejoués : {stats['cv_per_s']} CV/s")
+    print(f"   scoring {stats['scoring_s']}s • tri {stats['sorting_s']}s • rapport {stats['report_s']}s ({stats['report_kb']} Ko)")
+    for rank, (cv_name, score) in enumerate(stats["top"], start=1):
+        print(f"   {rank}. {cv_name:<25} {score}/100")
+    if stats["misses"]:
+        print(f"❌ {stats['misses']} requêtes absentes de la cassette : réenregistrez-la")
+        sys.exit(1)
@@ -0,0 +1,50 @@
+"""
+Ollama Profiles : réglages de génération mesurés par machine (voir autotune.py)
+config/ollama_profiles.json :
+    {"<hostname>": {"text_model": "llama3.2:3b-instruct-q4_K_M",
+                    "options": {"num_ctx": 3072, "num_predict": 600, "num_thread": 4},
+                    "keep_alive": "1h", "num_parallel": 2, "measured": {...}, "tuned_at": "..."},
+     "default": {...}}
+Le profil de la machine courante est chargé par LLMAnalyzer au démarrage ;
+"default" sert de repli pour les machines jamais calibrées.
+"""
+import json
+import logging
+import os
+import socket
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_PROFILES_PATH = os.getenv("HR_OLLAMA_PROFILES", os.path.join("config", "ollama_profiles.json"))
+FALLBACK_HOST = "default"
+
+def current_host() -> str:
+    """Clé du profil : HR_OLLAMA_HOST si défini (conteneurs au hostname aléatoire), sinon le hostname."""
+    return os.getenv("HR_OLLAMA_HOST") or socket.gethostname()
+
+def _read_profiles(path):
+    if not os.path.exists(path):
+        return {}
+    try:
+        with open(path, encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, ValueError) as e:
+        logger.warning(f"Profils Ollama illisibles ({path}) : {e}")
+        return {}
+
+def load_profile(host=None, path=None):
+    """Profil de la machine (ou "default"), None si aucun calibrage."""
+    profiles = _read_profiles(path or DEFAULT_PROFILES_PATH)
+    return profiles.get(host or current_host()) or profiles.get(FALLBACK_HOST)
+
+def save_profile(profile, host=None, path=None):
+    """Écrit (ou remplace) le profil d'une machine sans toucher aux autres."""
+    path = path or DEFAULT_PROFILES_PATH
+    profiles = _read_profiles(path)
+    profiles[host or current_host()] = profile
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    tmp_path = path + ".tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(profiles, f, ensure_ascii=False, indent=2)
+    os.replace(tmp_path, path)
+    return path
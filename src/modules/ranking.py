@@ -0,0 +1,166 @@
+"""
+Anytime Ranking : classement progressif avec arrêt anticipé
+Les CV les plus prometteurs sont notés en premier ; on s'arrête dès que le top-K
+ne devrait plus bouger compte tenu des bornes estimées des candidats restants.
+L'estimation repose sur le vocabulaire de l'offre : un CV fort rédigé avec d'autres
+mots peut être sous-estimé, d'où un mode désactivé par défaut dans l'app.
+"""
+import logging
+import math
+import re
+import threading
+
+from .cancellation import CampaignCancelled
+from .llm_analyzer import pinned_models
+from .scoring import SUBSCORES, MAX_SCORE, is_readable, score_cv
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_TOP_K = 5
+
+# Part du barème qui dépend du recouvrement CV / offre (cœur tech + outils).
+# Le reste (impact, séniorité, soft skills, récit) est supposé atteignable par tous.
+KEYWORD_POINTS = SUBSCORES["n_hard_skills_coeur"][1] + SUBSCORES["n_outils_metier"][1]
+BASE_POINTS = MAX_SCORE - KEYWORD_POINTS
+# Couvrir la moitié du vocabulaire de l'offre suffit à viser le maximum
+COVERAGE_SCALE = 2.0
+
+STOPWORDS = {
+    "les", "des", "une", "pour", "avec", "dans", "sur", "par", "est", "sont", "vous", "nous",
+    "qui", "que", "aux", "ses", "son", "leur", "plus", "pas", "the", "and", "for", "with",
+    "you", "our", "are", "will", "your", "from", "this", "that", "have",
+}
+
+_TOKEN_RE = re.compile(r"[a-zà-öø-ÿ0-9][a-zà-öø-ÿ0-9+#.]*", re.IGNORECASE)
+
+def _keywords(text):
+    tokens = {t.rstrip(".").lower() for t in _TOKEN_RE.findall(text or "")}
+    return {t for t in tokens if len(t) >= 3 and t not in STOPWORDS}
+
+def relevance_estimate(text, job_keywords) -> float:
+    """Estimation gratuite (sans LLM) : part des mots-clés de l'offre présents dans le CV."""
+    if not job_keywords or not is_readable(text):
+        return 0.0
+    return len(job_keywords & _keywords(text)) / len(job_keywords)
+
+def upper_bound(text, job_keywords) -> int:
+    """Borne haute optimiste du score_final d'un CV.
+    Heuristique (pas une garantie) : un CV illisible vaut 0, et les points
+    cœur tech + outils sont proportionnels au recouvrement avec l'offre."""
+    if not is_readable(text):
+        return 0
+    coverage = min(1.0, relevance_estimate(text, job_keywords) * COVERAGE_SCALE)
+    return min(MAX_SCORE, BASE_POINTS + math.ceil(KEYWORD_POINTS * coverage))
+
+class AnytimeRanker:
+    """Note les CV par priorité décroissante et expose un classement à tout instant.
+
+    candidates : liste de (nom_fichier, texte_extrait)
+    """
+
+    def __init__(self, candidates, job_desc, top_k=DEFAULT_TOP_K, llm=None, score_fn=score_cv, cancel_token=None):
+        self.job_desc = job_desc
+        self.cancel_token = cancel_token
+        self.top_k = top_k
+        self.llm = llm
+        self.score_fn = score_fn
+        job_keywords = _keywords(job_desc)
+        queue = [(upper_bound(text, job_keywords), name, text) for name, text in candidates]
+        # sort() est stable : à borne égale on garde l'ordre d'upload
+        queue.sort(key=lambda item: item[0], reverse=True)
+        self._queue = queue
+        self._results = []
+        self._lock = threading.Lock()
+        self._thread = None
+        self.total = len(queue)
+        self.on_background_done = None # callback(ranker) à la fin du classement en arrière-plan, même annulé
+
+    @property
+    def remaining(self):
+        return len(self._queue)
+
+    @property
+    def done(self):
+        return not self._queue
+
+    def step(self):
+        """Note le prochain CV de la file. Renvoie le résultat, ou None si la file est vide."""
+        with self._lock:
+            if not self._queue:
+                return None
+            bound, name, text = self._queue.pop(0)
+        result = self.score_fn(text, self.job_desc, self.llm, file_name=name)
+        result["upper_bound"] = bound
+        with self._lock:
+            self._results.append(result)
+        return result
+
+    def scored_since(self, index):
+        """Résultats dans l'ordre de notation, à partir du index-ième."""
+        with self._lock:
+            return list(self._results[index:])
+
+    def ranked(self):
+        with self._lock:
+            results = list(self._results)
+        return sorted(results, key=lambda x: int(x.get('score_final', 0)), reverse=True)
+
+    def unscored(self):
+        """Noms des CV encore en file (non notés), par priorité décroissante."""
+        with self._lock:
+            return [name for _, name, _ in self._queue]
+
+    def is_stable(self):
+        """Vrai si aucun CV restant ne devrait entrer dans le top-K (selon les bornes estimées)."""
+        with self._lock:
+            if not self._queue:
+                return True
+            if len(self._results) < self.top_k:
+                return False
+            kth_score = sorted((int(r.get('score_final', 0)) for r in self._results), reverse=True)[self.top_k - 1]
+            return kth_score >= self._queue[0][0]
+
+    def run(self, on_update=None, stop_when_stable=True):
+        """Boucle principale. on_update(ranker, result) est appelé après chaque CV."""
+        try:
+            while not self.done:
+                if self.cancel_token is not None:
+                    self.cancel_token.check()
+                if stop_when_stable and self.is_stable():
+                    break
+                result = self.step()
+                if result is None:
+                    break
+                if on_update:
+                    on_update(self, result)
+        except BaseException:
+            # Campagne remplacée ou run Streamlit interrompu : les CV restants sont abandonnés
+            if self.cancel_token is not None:
+                self.cancel_token.cancel("interrupted")
+                self.cancel_token.record_dropped(self.remaining)
+            raise
+        return self.ranked()
+
+    def continue_in_background(self):
+        """Termine les CV restants dans un thread (modèles épinglés jusqu'à la fin)."""
+        if self._thread is None and not self.done:
+            self._thread = threading.Thread(target=self._run_background, name="anytime-ranker", daemon=True)
+            self._thread.start()
+        return self._thread
+
+    def _run_background(self):
+        try:
+            with pinned_models(self.llm) as llm:
+                self.llm = llm
+                self.run(stop_when_stable=False)
+            logger.info(f"Classement terminé en arrière-plan ({self.total} CV)")
+        except CampaignCancelled as e:
+            logger.info(f"Classement en arrière-plan annulé ({e}), {self.remaining} CV abandonnés")
+        finally:
+            # Les CV notés avant une annulation sont archivés eux aussi
+            if self.on_background_done:
+                self.on_background_done(self)
+
+    @property
+    def running_in_background(self):
+        return self._thread is not None and self._thread.is_alive()
@@ -0,0 +1,232 @@
+"""
+Report Renderer : rapport de campagne en un seul fichier HTML statique (envoi par e-mail)
+Aucun serveur, aucun JavaScript : gabarits compilés au chargement du module,
+radars en SVG calculés côté Python, détails par candidat repliés dans des <details>.
+Usage : python -m src.modules.report_renderer <campaign_id> [rapport.html]
+"""
+import datetime
+import html
+import logging
+import math
+import os
+import sys
+
+from .scoring import SUBSCORES
+
+logger = logging.getLogger(__name__)
+
+# Axes du radar, dans l'ordre de SUBSCORES (mêmes libellés que l'app Streamlit)
+RADAR_LABELS = ["Cœur Tech", "Outils", "Impact", "Séniorité", "Soft Skills", "Clarté/Récit"]
+RADAR_AXES = [(key, cap, label) for (key, cap), label in zip(SUBSCORES.values(), RADAR_LABELS)]
+RADAR_CENTER = (110, 95)
+RADAR_RADIUS = 62
+# Vecteurs unitaires des axes (premier axe vers le haut, sens horaire)
+_AXIS_VECTORS = [
+    (math.sin(2 * math.pi * i / len(RADAR_AXES)), -math.cos(2 * math.pi * i / len(RADAR_AXES)))
+    for i in range(len(RADAR_AXES))
+]
+BAR_AXES = RADAR_AXES[:3] # Tech Cœur, Outils, Impact : barres de la recommandation n°1
+BAR_COLORS = ["#3B82F6", "#8B5CF6", "#10B981"]
+
+CSS = """
+body { font-family: 'Segoe UI', Arial, sans-serif; line-height: 1.5; color: #333; background-color: #f4f4f4; padding: 20px; margin: 0; }
+.container { max-width: 900px; margin: 0 auto; background: white; padding: 30px; border-radius: 8px; box-shadow: 0 2px 10px rgba(0,0,0,0.1); }
+.header { border-bottom: 2px solid #2c3e50; padding-bottom: 20px; margin-bottom: 20px; }
+.header h1 { margin: 0; color: #2c3e50; font-size: 24px; }
+.timestamp { color: #7f8c8d; font-size: 14px; margin-top: 5px; }
+.section-title { background-color: #3498db; color: white; padding: 10px 15px; border-radius: 4px; margin-top: 30px; margin-bottom: 15px; font-weight: bold; }
+.metrics-grid { display: grid; grid-template-columns: repeat(auto-fit, minmax(150px, 1fr)); gap: 15px; margin: 20px 0; }
+.metric-card { background: #fff; border: 1px solid #e0e0e0; padding: 15px; text-align: center; border-radius: 6px; }
+.metric-val { font-size: 24px; font-weight: bold; color: #2c3e50; }
+.metric-lbl { font-size: 12px; color: #7f8c8d; text-transform: uppercase; margin-top: 5px; }
+.spotlight { display: flex; flex-wrap: wrap; gap: 20px; align-items: center; border: 1px solid #e0e0e0; border-radius: 6px; padding: 20px; }
+.spotlight .score { font-size: 56px; font-weight: 900; color: #3B82F6; line-height: 1; }
+.meter { background: #E2E8F0; border-radius: 4px; height: 8px; margin: 2px 0 6px 0; }
+.meter div { height: 8px; border-radius: 4px; }
+.bar-lbl { display: flex; justify-content: space-between; font-size: 12px; font-weight: 600; color: #475569; min-width: 220px; }
+details.cand { border: 1px solid #eee; border-radius: 6px; margin-bottom: 6px; }
+details.cand[open] { border-color: #ccc; }
+details.cand summary { cursor: pointer; padding: 8px 12px; display: flex; align-items: center; gap: 12px; list-style: none; }
+details.cand summary::-webkit-details-marker { display: none; }
+.rank { color: #94A3B8; font-size: 12px; min-width: 36px; }
+.pill { color: white; border-radius: 6px; font-weight: 800; padding: 2px 8px; min-width: 30px; text-align: center; }
+.s-high { background: #10B981; } .s-mid { background: #F59E0B; } .s-low { background: #EF4444; }
+.cand-name { font-weight: 700; color: #0F172A; }
+.cand-meta { font-size: 13px; color: #64748B; }
+.cand-body { display: flex; flex-wrap: wrap; gap: 16px; padding: 0 12px 12px 12px; font-size: 14px; }
+.cand-body .text { flex: 1; min-width: 260px; }
+.force { color: #10B981; } .risk { color: #EF4444; }
+.badge-tech { display: inline-block; background: #EFF6FF; color: #1D4ED8; border-radius: 10px; padding: 1px 8px; font-size: 12px; margin: 2px 4px 2px 0; }
+.radar { width: 220px; height: 190px; flex: none; }
+.radar .shape { fill: rgba(59, 130, 246, 0.2); stroke: #3B82F6; stroke-width: 2; }
+.footer { text-align: center; margin-top: 40px; color: #aaa; font-size: 12px; }
+"""
+
+def _grid_svg():
+    """Toile du radar, définie une seule fois dans le document puis réutilisée par <use>.
+    Styles en attributs : les règles CSS ne traversent pas toujours un <use>."""
+    cx, cy = RADAR_CENTER
+    rings = []
+    for level in (0.25, 0.5, 0.75, 1.0):
+        points = " ".join(f"{cx + dx * RADAR_RADIUS * level:.1f},{cy + dy * RADAR_RADIUS * level:.1f}" for dx, dy in _AXIS_VECTORS)
+        rings.append(f'<polygon points="{points}"/>')
+    axes, labels = [], []
+    for (dx, dy), (_, _, label) in zip(_AXIS_VECTORS, RADAR_AXES):
+        x, y = cx + dx * RADAR_RADIUS, cy + dy * RADAR_RADIUS
+        axes.append(f'<line x1="{cx}" y1="{cy}" x2="{x:.1f}" y2="{y:.1f}"/>')
+        anchor = "middle" if abs(dx) < 0.1 else ("start" if dx > 0 else "end")
+        lx, ly = cx + dx * (RADAR_RADIUS + 8), cy + dy * (RADAR_RADIUS + 8) + 3
+        labels.append(f'<text stroke="none" fill="#64748B" font-size="9" x="{lx:.1f}" y="{ly:.1f}" text-anchor="{anchor}">{html.escape(label)}</text>')
+    return (
+        '<svg width="0" height="0" style="position:absolute"><defs><g id="radar-grid" fill="none" stroke="#CBD5E1">'
+        + "".join(rings + axes + labels)
+        + "</g></defs></svg>"
+    )
+
+# --- Gabarits (compilés une fois : str.format sur des chaînes constantes) ---
+PAGE_TEMPLATE = (
+    '<!DOCTYPE html><html lang="fr"><head><meta charset="utf-8"><title>{title}</title><style>'
+    + CSS.replace("{", "{{").replace("}", "}}")
+    + "</style></head><body>"
+    + _grid_svg()
+    + '<div class="container"><div class="header"><h1>🎯 {title}</h1><div class="timestamp">{subtitle}</div></div>'
+    + '<div class="metrics-grid">{metrics}</div>{spotlight}'
+    + '<div class="section-title">📋 Classement complet ({count} profils)</div>{candidates}{unscored}'
+    + '<div class="footer">Rapport automatique • Talent AI</div></div></body></html>'
+)
+METRIC_TEMPLATE = '<div class="metric-card"><div class="metric-val" style="color:{color}">{value}</div><div class="metric-lbl">{label}</div></div>'
+SPOTLIGHT_TEMPLATE = (
+    '<div class="section-title">🏆 Recommandation Numéro 1</div><div class="spotlight">'
+    '<div><div class="score">{score}</div><h2 style="margin:10px 0 0 0">{name}</h2>'
+    '<div class="cand-meta">{titre} • {years} ans</div><div style="margin-top:10px">{badges}</div></div>'
+    '<div>{bars}</div>{radar}</div>'
+    '<p><b>Synthèse IA :</b> {reasoning}</p><div class="force"><b>Force :</b> {strength}</div><div class="risk"><b>Risque :</b> {risk}</div>'
+)
+BAR_TEMPLATE = '<div class="bar-lbl"><span>{label}</span><span>{value}/{cap}</span></div><div class="meter"><div style="width:{percent:.0f}%;background:{color}"></div></div>'
+CANDIDATE_TEMPLATE = (
+    '<details class="cand"><summary><span class="rank">#{rank}</span><span class="pill {score_class}">{score}</span>'
+    '<span><span class="cand-name">{name}</span> <span class="cand-meta">— {titre}</span><br>'
+    '<span class="cand-meta">Tech {n_coeur}/65 | Outils {n_outils}/10 | Impact {n_imp}/10</span></span></summary>'
+    '<div class="cand-body">{radar}<div class="text"><p><b>Synthèse :</b> {reasoning}</p>'
+    '<div class="force"><b>💪 Force :</b> {strength}</div><div class="risk"><b>⚠️ Risque :</b> {risk}</div>'
+    '<div class="cand-meta" style="margin-top:6px">{email} {file_name}</div><div>{badges}</div></div></div></details>'
+)
+UNSCORED_TEMPLATE = (
+    '<div class="section-title">⏸️ CV non analysés ({count})</div>'
+    '<p class="cand-meta">Arrêt anticipé sur une estimation : ces CV n\'ont pas été notés '
+    'et ne comptent pas dans les indicateurs.</p><p>{names}</p>'
+)
+RADAR_TEMPLATE = '<svg class="radar" viewBox="0 0 220 190"><use href="#radar-grid"/><polygon class="shape" points="{points}"/></svg>'
+
+def _e(value) -> str:
+    return html.escape(str(value if value is not None else ""), quote=True)
+
+def _int(value) -> int:
+    try:
+        return int(value)
+    except (TypeError, ValueError):
+        return 0
+
+def _score_class(score) -> str:
+    return "s-high" if score >= 60 else ("s-mid" if score >= 40 else "s-low")
+
+def _skills(value):
+    if isinstance(value, str):
+        return [s.strip() for s in value.split(",") if s.strip()]
+    return list(value) if value is not None and not isinstance(value, float) else []
+
+def radar_svg(res) -> str:
+    """Radar des 6 sous-scores (en % du plafond) : un seul <polygon>, la toile est partagée."""
+    cx, cy = RADAR_CENTER
+    points = []
+    for (dx, dy), (key, cap, _) in zip(_AXIS_VECTORS, RADAR_AXES):
+        r = RADAR_RADIUS * min(max(_int(res.get(key)) / cap, 0.0), 1.0)
+        points.append(f"{cx + dx * r:.1f},{cy + dy * r:.1f}")
+    return RADAR_TEMPLATE.format(points=" ".join(points))
+
+def _badges(res, limit=8) -> str:
+    return "".join(f'<span class="badge-tech">{_e(c)}</span>' for c in _skills(res.get("compétences"))[:limit])
+
+def _spotlight(res) -> str:
+    bars = "".join(
+        BAR_TEMPLATE.format(label=_e(label), value=_int(res.get(key)), cap=cap, percent=min(_int(res.get(key)) / cap, 1.0) * 100, color=color)
+        for (key, cap, label), color in zip(BAR_AXES, BAR_COLORS)
+    )
+    return SPOTLIGHT_TEMPLATE.format(
+        score=_int(res.get("score_final")), name=_e(res.get("nom", "Anonyme")), titre=_e(res.get("titre_profil", "")),
+        years=_e(res.get("années_exp", 0)), badges=_badges(res, 5), bars=bars, radar=radar_svg(res),
+        reasoning=_e(res.get("reasoning", "")), strength=_e(res.get("strength", "")), risk=_e(res.get("risk", "")),
+    )
+
+def _candidate(rank, res) -> str:
+    score = _int(res.get("score_final"))
+    return CANDIDATE_TEMPLATE.format(
+        rank=rank, score=score, score_class=_score_class(score),
+        name=_e(res.get("nom", "Anonyme")), titre=_e(res.get("titre_profil", "")),
+        n_coeur=_int(res.get("n_coeur")), n_outils=_int(res.get("n_outils")), n_imp=_int(res.get("n_imp")),
+        radar=radar_svg(res), reasoning=_e(res.get("reasoning", "")),
+        strength=_e(res.get("strength", "-")), risk=_e(res.get("risk", "-")),
+        email=f"📧 {_e(res['email'])}" if res.get("email") else "", file_name=f"📄 {_e(res['file_name'])}" if res.get("file_name") else "",
+        badges=_badges(res),
+    )
+
+def render_report_html(results, volume=None, title="Rapport d'Analyse", role="", elapsed=None, generated_at=None, unscored=None) -> str:
+    """Rapport complet (KPI, recommandation n°1, classement replié) en une chaîne HTML autonome.
+    results : dicts de score_cv, dans n'importe quel ordre (triés ici par score décroissant).
+    unscored : noms des CV non notés (arrêt anticipé), listés à part et exclus des KPI."""
+    ranked = sorted(results, key=lambda r: _int(r.get("score_final")), reverse=True)
+    scores = [_int(r.get("score_final")) for r in ranked]
+    generated_at = generated_at or datetime.datetime.now()
+    subtitle = f"Généré le {generated_at:%Y-%m-%d %H:%M}"
+    if role:
+        subtitle += f" • {role}"
+    if elapsed is not None:
+        subtitle += f" • analyse en {round(elapsed, 1)}s"
+
+    gap = scores[0] - scores[1] if len(scores) > 1 else (scores[0] if scores else 0)
+    metrics = "".join(
+        METRIC_TEMPLATE.format(value=value, label=label, color=color)
+        for value, label, color in (
+            (volume if volume is not None else len(ranked), "Volumétrie", "#0F172A"),
+            (f"{scores[0] if scores else 0}%", "Meilleur match", "#10B981"),
+            (f"{int(sum(scores) / len(scores)) if scores else 0}%", "Moyenne des CV notés" if unscored else "Moyenne du pool", "#3B82F6"),
+            (f"+{gap} pts", "Écart n°1 vs n°2", "#F59E0B"),
+        )
+    )
+    spotlight = _spotlight(ranked[0]) if ranked and scores[0] > 0 else ""
+    candidates = "".join([_candidate(rank, res) for rank, res in enumerate(ranked, start=1)])
+    skipped = UNSCORED_TEMPLATE.format(count=len(unscored), names=", ".join(_e(name) for name in unscored)) if unscored else ""
+    return PAGE_TEMPLATE.format(
+        title=_e(title), subtitle=_e(subtitle), metrics=metrics, spotlight=spotlight, count=len(ranked), candidates=candidates,
+        unscored=skipped,
+    )
+
+def write_report(path, results, **kwargs):
+    """Écrit le rapport sur disque et renvoie son chemin."""
+    content = render_report_html(results, **kwargs)
+    with open(path, "w", encoding="utf-8") as f:
+        f.write(content)
+    logger.info(f"Rapport HTML : {len(results)} candidats, {len(content.encode('utf-8')) // 1024} Ko ({path})")
+    return path
+
+def results_from_history(frame):
+    """Lignes du CampaignHistoryStore -> dicts au format de score_cv."""
+    records = frame.rename(columns={"competences": "compétences", "annees_exp": "années_exp"}).to_dict("records")
+    for record in records:
+        record["compétences"] = _skills(record.get("compétences"))
+    return records
+
+if __name__ == "__main__":
+    if len(sys.argv) < 2:
+        print("Usage : python -m src.modules.report_renderer <campaign_id> [rapport.html]")
+        sys.exit(1)
+    from .history_store import CampaignHistoryStore
+    campaign = sys.argv[1]
+    output = sys.argv[2] if len(sys.argv) > 2 else f"rapport_{campaign}.html"
+    frame = CampaignHistoryStore().query(campaign_id=campaign)
+    if frame.empty:
+        print(f"❌ Campagne inconnue : {campaign}")
+        sys.exit(1)
+    rows = results_from_history(frame)
+    write_report(output, rows, role=rows[0].get("role", ""))
+    print(f"✅ {len(rows)} candidats -> {output} ({os.path.getsize(output) // 1024} Ko)")
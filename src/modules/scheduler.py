@@ -0,0 +1,204 @@
+"""
+Inference Scheduler : file d'attente partagée entre toutes les sessions Streamlit
+Une seule instance par process (st.cache_resource) : la concurrence globale est
+bornée au nombre de slots d'Ollama et les sessions sont servies à tour de rôle.
+"""
+import logging
+import os
+import threading
+import time
+from collections import OrderedDict, deque
+from contextlib import contextmanager
+from dataclasses import dataclass
+
+from .cancellation import SESSION_TTL_SECONDS
+from .ollama_profile import load_profile
+
+logger = logging.getLogger(__name__)
+
+# Même variable d'environnement que le serveur Ollama (slots de génération parallèles),
+# à défaut la valeur mesurée par l'autotune pour cette machine
+DEFAULT_MAX_CONCURRENCY = int(os.getenv("OLLAMA_NUM_PARALLEL") or (load_profile() or {}).get("num_parallel", 1))
+# Durée d'une génération avant toute mesure (pour l'ETA du tout premier CV)
+DEFAULT_REQUEST_SECONDS = 30.0
+EMA_ALPHA = 0.2
+WAIT_POLL_SECONDS = 0.5
+
+@dataclass
+class SessionStats:
+    submitted: int = 0
+    completed: int = 0
+    busy_seconds: float = 0.0
+    wait_seconds: float = 0.0
+    active_seconds: float = 0.0 # temps avec au moins une requête en file ou en cours
+    pending: int = 0
+    window_start: float = 0.0
+    last_request_at: float = 0.0
+
+    def _begin(self, now):
+        if self.pending == 0:
+            self.window_start = now
+        self.pending += 1
+        self.last_request_at = now
+
+    def _end(self, now):
+        self.pending -= 1
+        self.last_request_at = now
+        if self.pending == 0:
+            self.active_seconds += now - self.window_start
+
+    @property
+    def throughput_per_min(self):
+        """CV/min sur les seules périodes d'activité : les pauses entre campagnes ne comptent pas."""
+        elapsed = self.active_seconds
+        if self.pending:
+            elapsed += time.time() - self.window_start
+        return round(self.completed * 60 / elapsed, 1) if elapsed > 0 else 0.0
+
+    @property
+    def avg_wait_seconds(self):
+        return round(self.wait_seconds / self.completed, 1) if self.completed else 0.0
+
+class InferenceScheduler:
+    """Sémaphore équitable : round-robin entre sessions, FIFO dans une session."""
+
+    def __init__(self, max_concurrency=DEFAULT_MAX_CONCURRENCY):
+        self.max_concurrency = max(1, int(max_concurrency))
+        self.avg_request_seconds = DEFAULT_REQUEST_SECONDS
+        self.stats = {}
+        self._cond = threading.Condition()
+        self._queues = OrderedDict() # session_id -> deque de tickets en attente
+        self._granted = set()
+        self._active = 0
+
+    @contextmanager
+    def slot(self, session_id, on_wait=None, cancel_token=None):
+        """Bloque jusqu'à obtenir un slot d'inférence pour cette session.
+        on_wait(position, eta_seconds) est appelé régulièrement pendant l'attente ;
+        si cancel_token est annulé, la requête quitte la file (CampaignCancelled)."""
+        ticket = object()
+        queued_at = time.time()
+        with self._cond:
+            if session_id not in self.stats:
+                self._prune_stats(queued_at)
+            stats = self.stats.setdefault(session_id, SessionStats())
+            stats.submitted += 1
+            stats._begin(queued_at)
+            self._queues.setdefault(session_id, deque()).append(ticket)
+            self._dispatch()
+        try:
+            self._wait_for(session_id, ticket, on_wait, cancel_token)
+        except BaseException:
+            if cancel_token is not None and cancel_token.cancelled:
+                cancel_token.record_dropped()
+            # Rerun Streamlit (StopException) pendant l'attente : on rend la place
+            self._abandon(session_id, ticket)
+            with self._cond:
+                stats._end(time.time())
+            raise
+        started_at = time.time()
+        try:
+            yield
+        finally:
+            finished_at = time.time()
+            with self._cond:
+                self._active -= 1
+                duration = finished_at - started_at
+                self.avg_request_seconds += EMA_ALPHA * (duration - self.avg_request_seconds)
+                stats.completed += 1
+                stats.busy_seconds += duration
+                stats.wait_seconds += started_at - queued_at
+                stats._end(finished_at)
+                self._dispatch()
+
+    def _prune_stats(self, now):
+        # Appelé sous self._cond, à l'arrivée d'une nouvelle session
+        expired = [
+            sid for sid, stats in self.stats.items()
+            if not stats.pending and now - stats.last_request_at > SESSION_TTL_SECONDS
+        ]
+        for sid in expired:
+            del self.stats[sid]
+
+    def _wait_for(self, session_id, ticket, on_wait, cancel_token=None):
+        # Le callback (rendu Streamlit) est appelé hors verrou pour ne pas bloquer les autres sessions
+        while True:
+            if cancel_token is not None:
+                cancel_token.check()
+            with self._cond:
+                if ticket in self._granted:
+                    self._granted.discard(ticket)
+                    return
+                position = self._position(session_id, ticket)
+                eta = self._eta(position)
+            if on_wait:
+                on_wait(position, eta)
+            with self._cond:
+                if ticket not in self._granted:
+                    self._cond.wait(WAIT_POLL_SECONDS)
+
+    def _abandon(self, session_id, ticket):
+        with self._cond:
+            if ticket in self._granted:
+                # Slot déjà attribué mais jamais utilisé
+                self._granted.discard(ticket)
+                self._active -= 1
+            else:
+                queue = self._queues.get(session_id)
+                if queue and ticket in queue:
+                    queue.remove(ticket)
+                    if not queue:
+                        del self._queues[session_id]
+            self._dispatch()
+
+    def _dispatch(self):
+        # Appelé sous self._cond : attribue les slots libres, une session après l'autre
+        while self._active < self.max_concurrency and self._queues:
+            session_id, queue = next(iter(self._queues.items()))
+            self._granted.add(queue.popleft())
+            self._active += 1
+            if queue:
+                self._queues.move_to_end(session_id)
+            else:
+                del self._queues[session_id]
+        self._cond.notify_all()
+
+    def _position(self, session_id, ticket):
+        """Rang du ticket dans l'ordre de service round-robin (1 = prochain servi)."""
+        queues = [list(q) for q in self._queues.values()]
+        position = 0
+        for depth in range(max((len(q) for q in queues), default=0)):
+            for queue in queues:
+                if depth < len(queue):
+                    position += 1
+                    if queue[depth] is ticket:
+                        return position
+        return position
+
+    def _eta(self, position):
+        # Les slots se libèrent par vagues de max_concurrency requêtes
+        waves = (position - 1) // self.max_concurrency + 1
+        return round(waves * self.avg_request_seconds, 1)
+
+    def queue_position(self, session_id):
+        """Position du prochain ticket de la session (0 si rien en attente)."""
+        with self._cond:
+            queue = self._queues.get(session_id)
+            return self._position(session_id, queue[0]) if queue else 0
+
+    def campaign_eta(self, session_id, remaining):
+        """Temps estimé pour `remaining` requêtes compte tenu du partage avec les autres sessions."""
+        with self._cond:
+            sessions = len(set(self._queues) | {session_id})
+            share = min(1.0, self.max_concurrency / sessions)
+            return round(remaining * self.avg_request_seconds / share, 1)
+
+    def snapshot(self):
+        with self._cond:
+            return {
+                "active": self._active,
+                "waiting": sum(len(q) for q in self._queues.values()),
+                "sessions_waiting": len(self._queues),
+                "max_concurrency": self.max_concurrency,
+                "avg_request_seconds": round(self.avg_request_seconds, 1),
+            }
@@ -0,0 +1,110 @@
+"""
+Scoring Module : Prompt de notation + barème strict (score_final sur 100)
+"""
+import hashlib
+import json
+import re
+import time
+
+from .cancellation import CampaignCancelled
+from .llm_analyzer import create_analyzer
+
+# Plafond de chaque sous-score : clé JSON du LLM -> (clé interne, max)
+SUBSCORES = {
+    "n_hard_skills_coeur": ("n_coeur", 65),
+    "n_outils_metier": ("n_outils", 10),
+    "n_business_impact": ("n_imp", 10),
+    "n_seniorite": ("n_sen", 5),
+    "n_soft_skills": ("n_soft", 5),
+    "n_storytelling": ("n_story", 5),
+}
+MAX_SCORE = sum(cap for _, cap in SUBSCORES.values())
+
+def process_cv_one_shot(text_content, job_desc, llm=None) -> dict:
+    """Un seul appel LLM : extraction + notation du CV (JSON brut du modèle)."""
+    llm = llm or create_analyzer()
+    prompt = f"""
+    Tu es un Directeur Technique et Recruteur IMPITOYABLE. 
+    TACHE : Évalue l'adéquation technique exacte entre ce CV et cette offre.
+    
+    JOB DESCRIPTION: {job_desc[:1500]}
+    TEXTE DU CV : {text_content[:6000]}
+    
+    RÈGLES DE SCORING (BARÈME MATHÉMATIQUE STRICT) :
+    🚨 RÈGLE DE SURVIE : Si l'expérience du candidat n'a RIEN A VOIR avec le métier de l'offre (ex: un commercial qui postule comme Data Scientist), le score 'n_hard_skills_coeur' DOIT ÊTRE DE 0/65.
+    
+    - 'n_hard_skills_coeur' (Sur 65) : Calcule la note ainsi :
+        * 55-65 : Le candidat maîtrise 100% des technologies clés de l'offre avec des années de pratique prouvées.
+        * 35-54 : Le candidat maîtrise certaines technos, mais il lui manque au moins une compétence technique CRUCIALE demandée dans l'offre.
+        * 15-34 : Connaissances théoriques, profil junior, ou ne possède que 20% de la stack technique demandée.
+        * 0-14 : Débutant total ou profil hors sujet.
+        
+    - 'n_outils_metier' (Sur 10) : 1 point par outil de l'offre réellement écrit sur le CV.
+    - 'n_business_impact' (Sur 10) : 0/10 direct s'il n'y a AUCUNE métrique chiffrée (euros, pourcentages) dans ses expériences.
+    - 'n_seniorite' (Sur 5) : 5 uniquement si le nombre d'années d'expérience requis est atteint.
+    - 'n_soft_skills' (Sur 5) : Ne mets jamais plus de 3.
+    - 'n_storytelling' (Sur 5) : Ne mets jamais plus de 3.
+    
+    OUTPUT JSON STRICT : 
+    IMPORTANT : Tu dois obligatoirement remplir la clé "analyse_preliminaire" EN PREMIER pour justifier tes futurs scores en listant ce qu'il MANQUE au candidat.
+    {{ 
+        "analyse_preliminaire": "Le candidat maîtrise X et Y, mais il ne mentionne absolument pas Z qui est requis. Son impact business n'est pas chiffré. Le score technique sera donc moyen/faible.",
+        "nom": "Prénom Nom",
+        "titre_profil": "Titre du profil sur le CV",
+        "email": "email@trouvé_ou_vide",
+        "années_exp": 0,
+        "compétences": ["C1", "C2"],
+        "réalisations_clés": ["Action 1", "Action 2"],
+        "n_hard_skills_coeur": 0, 
+        "n_outils_metier": 0, 
+        "n_business_impact": 0,
+        "n_seniorite": 0, 
+        "n_soft_skills": 0, 
+        "n_storytelling": 0,
+        "strength": "Atout majeur prouvé", 
+        "risk": "Lacune technique ou métier précise", 
+        "reasoning": "Conclusion ultra-courte" 
+    }}
+    """
+    try:
+        response = llm.client.generate_content(prompt)
+        txt = response.text
+        json_match = re.search(r'\{.*\}', txt, re.DOTALL)
+        if json_match: return json.loads(json_match.group(0))
+        return {"nom": "Erreur JSON"}
+    except CampaignCancelled:
+        raise
+    except Exception as e: return {"nom": f"Erreur IA : {str(e)}"}
+
+def apply_scores(data) -> dict:
+    """Borne chaque sous-score à son plafond et calcule score_final."""
+    scores = {key: min(int(data.get(llm_key, 0)), cap) for llm_key, (key, cap) in SUBSCORES.items()}
+    data.update(scores)
+    data["score_final"] = sum(scores.values())
+    return data
+
+def is_readable(text) -> bool:
+    return bool(text) and len(text) >= 20 and "ERREUR" not in text
+
+def text_hash(text) -> str:
+    """Empreinte courte du texte extrait (dédoublonnage / historique)."""
+    return hashlib.sha256((text or "").encode("utf-8")).hexdigest()[:16]
+
+def score_cv(text, job_desc, llm=None, file_name="") -> dict:
+    """Pipeline complet pour un CV : texte illisible -> 0, sinon LLM + barème.
+    Ajoute les métadonnées d'exécution (modèle, durées Ollama, empreinte du texte)."""
+    if not is_readable(text):
+        return {"nom": file_name, "file_name": file_name, "score_final": 0, "reasoning": "Illisible.", "text_hash": text_hash(text)}
+    llm = llm or create_analyzer()
+    start = time.time()
+    data = apply_scores(process_cv_one_shot(text, job_desc, llm))
+    metrics = getattr(llm, "last_metrics", {}) or {}
+    data.update({
+        "file_name": file_name,
+        "text_hash": text_hash(text),
+        "model": getattr(llm, "text_model", ""),
+        "duration_s": round(time.time() - start, 3),
+        "eval_count": metrics.get("eval_count", 0),
+        "prompt_eval_count": metrics.get("prompt_eval_count", 0),
+    })
+    return data
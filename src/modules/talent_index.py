@@ -0,0 +1,434 @@
+"""
+Talent Index : index inversé sur le texte extrait des CV (recherche dans le vivier)
+Segments immuables sur disque (un par lot ajouté), fusionnés en mémoire à l'ouverture :
+    data/talent_index/docs.jsonl            métadonnées (1 ligne par CV)
+    data/talent_index/segments/seg-*.npz    postings {terme: (doc_ids, tfs, offsets, positions)}
+    data/talent_index/segments.json         segments vivants (remplacé atomiquement, fait foi)
+Segments en npz (tableaux numpy, sans pickle) : ouvrir un répertoire d'index ne peut pas exécuter de code.
+docs.jsonl est écrit avant le segment ; à l'ouverture, l'index est réaligné après une écriture interrompue.
+Requêtes booléennes (AND implicite, OR, NOT / -, parenthèses), phrases "entre guillemets",
+classement BM25.
+"""
+import json
+import logging
+import os
+import re
+import threading
+import unicodedata
+from collections import defaultdict
+
+import numpy as np
+
+from .scoring import text_hash
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_INDEX_DIR = os.getenv("HR_TALENT_INDEX_DIR", os.path.join("data", "talent_index"))
+DOCS_FILE = "docs.jsonl"
+SEGMENTS_DIR = "segments"
+SEGMENTS_MANIFEST = "segments.json"
+MAX_SEGMENTS = 16 # au-delà, les segments sont fusionnés en un seul fichier
+BM25_K1 = 1.2
+BM25_B = 0.75
+
+# Garde les jetons techniques entiers : c++, c#, node.js, .net, 3.5 ; [^\W_] = lettre ou chiffre (Unicode)
+_TOKEN_RE = re.compile(r"\.?[^\W_]+(?:\.[^\W_]+)*[+#]*")
+_QUERY_RE = re.compile(r'"[^"]*"|\(|\)|[^\s()"]+')
+_COMBINING_RE = re.compile(r"[\u0300-\u036f]")
+# Lettres que NFKD ne décompose pas : "œuvre" doit se chercher "oeuvre", "Łukasz" "lukasz"
+_FOLD = str.maketrans({"œ": "oe", "æ": "ae", "ß": "ss", "ł": "l", "ø": "o", "đ": "d"})
+# Clé (doc, position) sur un seul entier pour les recherches de phrases vectorisées
+POSITION_BITS = 32
+
+def normalize(text) -> str:
+    """Minuscules + suppression des accents ('Développeur' -> 'developpeur', 'cœur' -> 'coeur')."""
+    text = text or ""
+    if text.isascii():
+        return text.lower()
+    return _COMBINING_RE.sub("", unicodedata.normalize("NFKD", text.lower().translate(_FOLD)))
+
+def tokenize(text):
+    return _TOKEN_RE.findall(normalize(text))
+
+def _build_postings(docs):
+    """docs : [(doc_id, tokens)] -> {terme: (doc_ids, tfs, offsets, positions)} en numpy.
+    Un seul tri (terme, doc, position) sur tout le lot au lieu de boucles Python par token."""
+    vocabulary = {}
+    term_ids = [vocabulary.setdefault(token, len(vocabulary)) for _, tokens in docs for token in tokens]
+    lengths = np.fromiter((len(tokens) for _, tokens in docs), dtype=np.int64, count=len(docs))
+    all_terms = np.asarray(term_ids, dtype=np.int32)
+    all_docs = np.repeat(np.fromiter((doc_id for doc_id, _ in docs), dtype=np.int32, count=len(docs)), lengths)
+    starts = np.repeat(np.cumsum(lengths) - lengths, lengths)
+    all_positions = (np.arange(len(all_terms), dtype=np.int64) - starts).astype(np.int32)
+
+    order = np.lexsort((all_positions, all_docs, all_terms))
+    all_terms, all_docs, all_positions = all_terms[order], all_docs[order], all_positions[order]
+
+    # Une "run" = toutes les positions d'un terme dans un même CV
+    boundary = np.ones(len(all_terms), dtype=bool)
+    boundary[1:] = (all_terms[1:] != all_terms[:-1]) | (all_docs[1:] != all_docs[:-1])
+    run_starts = np.flatnonzero(boundary)
+    run_terms = all_terms[run_starts]
+    run_docs = all_docs[run_starts]
+    run_tfs = np.diff(np.append(run_starts, len(all_terms))).astype(np.int32)
+
+    term_run_starts = np.flatnonzero(np.r_[True, run_terms[1:] != run_terms[:-1]])
+    term_run_ends = np.append(term_run_starts[1:], len(run_terms))
+    terms = list(vocabulary)
+    segment = {}
+    for first, last in zip(term_run_starts.tolist(), term_run_ends.tolist()):
+        tfs = run_tfs[first:last]
+        offsets = np.zeros(len(tfs) + 1, dtype=np.int64)
+        np.cumsum(tfs, out=offsets[1:])
+        position_start = run_starts[first]
+        positions = all_positions[position_start:position_start + offsets[-1]]
+        segment[terms[run_terms[first]]] = (run_docs[first:last].copy(), tfs.copy(), offsets, positions.copy())
+    return segment
+
+def _merge_postings(parts):
+    """Concatène des postings dont les doc_ids sont croissants d'une partie à l'autre."""
+    if len(parts) == 1:
+        return parts[0]
+    offsets, base = [np.zeros(1, dtype=np.int64)], 0
+    for part in parts:
+        offsets.append(part[2][1:] + base)
+        base += part[2][-1]
+    return (
+        np.concatenate([p[0] for p in parts]),
+        np.concatenate([p[1] for p in parts]),
+        np.concatenate(offsets),
+        np.concatenate([p[3] for p in parts]),
+    )
+
+def _truncate_postings(postings, n_docs):
+    """Postings restreints aux doc_ids < n_docs (None si plus aucun)."""
+    doc_ids, tfs, offsets, positions = postings
+    keep = int(np.searchsorted(doc_ids, n_docs))
+    if keep == len(doc_ids):
+        return postings
+    if keep == 0:
+        return None
+    return doc_ids[:keep], tfs[:keep], offsets[:keep + 1], positions[:offsets[keep]]
+
+def _concat(arrays, dtype):
+    return np.concatenate(arrays).astype(dtype, copy=False) if arrays else np.zeros(0, dtype=dtype)
+
+def _save_segment(path, segment):
+    """Écriture atomique d'un segment : postings à plat + bornes par terme."""
+    terms = list(segment)
+    tmp_path = path + ".tmp"
+    with open(tmp_path, "wb") as f:
+        np.savez(
+            f,
+            terms=np.frombuffer("\n".join(terms).encode("utf-8"), dtype=np.uint8),
+            doc_counts=np.fromiter((len(segment[t][0]) for t in terms), dtype=np.int64, count=len(terms)),
+            doc_ids=_concat([segment[t][0] for t in terms], np.int32),
+            tfs=_concat([segment[t][1] for t in terms], np.int32),
+            positions=_concat([segment[t][3] for t in terms], np.int32),
+        )
+    os.replace(tmp_path, path)
+
+def _read_segment(path):
+    with np.load(path, allow_pickle=False) as data:
+        raw_terms = data["terms"].tobytes()
+        doc_counts, doc_ids, tfs, positions = data["doc_counts"], data["doc_ids"], data["tfs"], data["positions"]
+    terms = raw_terms.decode("utf-8").split("\n") if raw_terms else []
+    doc_bounds = np.zeros(len(terms) + 1, dtype=np.int64)
+    np.cumsum(doc_counts, out=doc_bounds[1:])
+    tf_bounds = np.zeros(len(tfs) + 1, dtype=np.int64)
+    np.cumsum(tfs, out=tf_bounds[1:])
+    segment = {}
+    for term, first, last in zip(terms, doc_bounds[:-1].tolist(), doc_bounds[1:].tolist()):
+        offsets = tf_bounds[first:last + 1] - tf_bounds[first]
+        segment[term] = (doc_ids[first:last], tfs[first:last], offsets, positions[tf_bounds[first]:tf_bounds[last]])
+    return segment
+
+class TalentIndex:
+    def __init__(self, root=DEFAULT_INDEX_DIR):
+        self.root = root
+        self.docs = [] # métadonnées, indexées par doc_id
+        self._hashes = set()
+        self._postings = {}
+        self._doc_lengths = np.zeros(0, dtype=np.int32)
+        self._segment_files = []
+        self._lock = threading.Lock()
+        self._load()
+
+    # --- Persistance ---
+    def _load(self):
+        docs_path = os.path.join(self.root, DOCS_FILE)
+        rewrite_docs = False
+        if os.path.exists(docs_path):
+            with open(docs_path, encoding="utf-8") as f:
+                for line in f:
+                    if not line.strip():
+                        continue
+                    try:
+                        self.docs.append(json.loads(line))
+                    except ValueError:
+                        # Dernière ligne tronquée par un arrêt brutal
+                        rewrite_docs = True
+                        break
+        segments_dir = os.path.join(self.root, SEGMENTS_DIR)
+        on_disk = sorted(f for f in os.listdir(segments_dir) if f.endswith(".npz")) if os.path.isdir(segments_dir) else []
+        manifest_path = os.path.join(self.root, SEGMENTS_MANIFEST)
+        if os.path.exists(manifest_path):
+            with open(manifest_path, encoding="utf-8") as f:
+                live = json.load(f)["segments"]
+            self._segment_files = [name for name in live if name in on_disk]
+            # Segment écrit mais jamais publié, ou remplacé par une compaction interrompue avant le ménage
+            for name in set(on_disk) - set(live):
+                os.remove(os.path.join(segments_dir, name))
+        else:
+            self._segment_files = on_disk
+        parts = defaultdict(list)
+        for name in self._segment_files:
+            for token, postings in _read_segment(os.path.join(segments_dir, name)).items():
+                parts[token].append(postings)
+        self._postings = {token: _merge_postings(postings) for token, postings in parts.items()}
+
+        # Réalignement docs / postings après une écriture interrompue
+        indexed = self._max_doc_id() + 1
+        if indexed < len(self.docs):
+            # docs.jsonl écrit, segment perdu : ces CV seront réindexés au prochain ajout
+            logger.warning(f"Index vivier : {len(self.docs) - indexed} CV sans postings ignorés")
+            self.docs = self.docs[:indexed]
+            rewrite_docs = True
+        elif indexed > len(self.docs):
+            # Postings sans métadonnées : retirés, sinon search() sortirait de self.docs
+            logger.warning(f"Index vivier : postings orphelins (doc_id >= {len(self.docs)}) retirés")
+            truncated = {token: _truncate_postings(postings, len(self.docs)) for token, postings in self._postings.items()}
+            self._postings = {token: postings for token, postings in truncated.items() if postings is not None}
+            self._compact()
+        if rewrite_docs:
+            self._rewrite_docs()
+        self._hashes = {doc["text_hash"] for doc in self.docs}
+        self._doc_lengths = np.asarray([doc["length"] for doc in self.docs], dtype=np.int32)
+
+    def _rewrite_docs(self):
+        docs_path = os.path.join(self.root, DOCS_FILE)
+        tmp_path = docs_path + ".tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            for meta in self.docs:
+                f.write(json.dumps(meta, ensure_ascii=False) + "\n")
+        os.replace(tmp_path, docs_path)
+
+    def _max_doc_id(self):
+        return max((int(p[0][-1]) for p in self._postings.values() if len(p[0])), default=-1)
+
+    def _add_segment(self, segment):
+        for token, postings in segment.items():
+            existing = self._postings.get(token)
+            self._postings[token] = postings if existing is None else _merge_postings([existing, postings])
+
+    def _write_manifest(self, names):
+        manifest_path = os.path.join(self.root, SEGMENTS_MANIFEST)
+        tmp_path = manifest_path + ".tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump({"segments": names}, f)
+        os.replace(tmp_path, manifest_path)
+
+    def _next_segment_name(self):
+        last = max((int(f[4:10]) for f in self._segment_files), default=0)
+        return f"seg-{last + 1:06d}.npz"
+
+    def _write_segment(self, segment):
+        segments_dir = os.path.join(self.root, SEGMENTS_DIR)
+        os.makedirs(segments_dir, exist_ok=True)
+        name = self._next_segment_name()
+        _save_segment(os.path.join(segments_dir, name), segment)
+        self._write_manifest(self._segment_files + [name])
+        self._segment_files.append(name)
+
+    def add_documents(self, documents):
+        """Ajout incrémental. documents : dicts avec 'text' + métadonnées libres
+        (nom, campaign_id, file_name...). Les textes déjà indexés sont ignorés.
+        Renvoie le nombre de CV ajoutés."""
+        with self._lock:
+            new_docs, tokenized, new_hashes = [], [], set()
+            for document in documents:
+                text = document.get("text") or ""
+                digest = text_hash(text)
+                if digest in self._hashes or digest in new_hashes:
+                    continue
+                tokens = tokenize(text)
+                if not tokens:
+                    continue
+                new_hashes.add(digest)
+                doc_id = len(self.docs) + len(new_docs)
+                meta = {k: v for k, v in document.items() if k != "text"}
+                meta.update({"doc_id": doc_id, "text_hash": digest, "length": len(tokens)})
+                new_docs.append(meta)
+                tokenized.append((doc_id, tokens))
+            if not new_docs:
+                return 0
+
+            segment = _build_postings(tokenized)
+            os.makedirs(self.root, exist_ok=True)
+            docs_path = os.path.join(self.root, DOCS_FILE)
+            docs_size = os.path.getsize(docs_path) if os.path.exists(docs_path) else 0
+            try:
+                with open(docs_path, "a", encoding="utf-8") as f:
+                    for meta in new_docs:
+                        f.write(json.dumps(meta, ensure_ascii=False) + "\n")
+                self._write_segment(segment)
+            except BaseException:
+                # Rien n'est indexé : docs.jsonl revient à son état d'avant, le lot pourra être réessayé
+                if os.path.exists(docs_path):
+                    with open(docs_path, "r+b") as f:
+                        f.truncate(docs_size)
+                raise
+            self._add_segment(segment)
+            self.docs.extend(new_docs)
+            self._hashes.update(new_hashes)
+            self._doc_lengths = np.concatenate([self._doc_lengths, np.asarray([m["length"] for m in new_docs], dtype=np.int32)])
+            if len(self._segment_files) > MAX_SEGMENTS:
+                self._compact()
+            logger.info(f"Index vivier : {len(new_docs)} CV ajoutés ({len(self.docs)} au total)")
+            return len(new_docs)
+
+    def _compact(self):
+        """Réécrit tous les segments en un seul (les postings fusionnés sont déjà en mémoire)."""
+        segments_dir = os.path.join(self.root, SEGMENTS_DIR)
+        os.makedirs(segments_dir, exist_ok=True)
+        old_files = list(self._segment_files)
+        name = self._next_segment_name()
+        _save_segment(os.path.join(segments_dir, name), self._postings)
+        # Bascule atomique : les anciens segments ne sont plus lus, même si la suppression échoue
+        self._write_manifest([name])
+        self._segment_files = [name]
+        for old in old_files:
+            try:
+                os.remove(os.path.join(segments_dir, old))
+            except OSError as e:
+                logger.warning(f"Index vivier : ancien segment {old} non supprimé ({e}), retiré à la prochaine ouverture")
+
+    # --- Recherche ---
+    def search(self, query, limit=20):
+        """Renvoie [(score BM25, métadonnées du CV)] triés par pertinence."""
+        with self._lock:
+            n_docs = len(self.docs)
+            if n_docs == 0:
+                return []
+            tokens = _QUERY_RE.findall(query or "")
+            if not tokens:
+                return []
+            parser = _QueryParser(tokens, self, n_docs)
+            mask, scores = parser.parse()
+            candidates = np.flatnonzero(mask)
+            if not len(candidates):
+                return []
+            candidate_scores = scores[candidates]
+            if len(candidates) > limit:
+                top = np.argpartition(-candidate_scores, limit - 1)[:limit]
+                candidates, candidate_scores = candidates[top], candidate_scores[top]
+            order = np.argsort(-candidate_scores, kind="stable")
+            return [(round(float(candidate_scores[i]), 3), self.docs[int(candidates[i])]) for i in order]
+
+    def _term_scores(self, term, n_docs):
+        """(masque, scores BM25) d'un terme sur tout l'index."""
+        mask = np.zeros(n_docs, dtype=bool)
+        scores = np.zeros(n_docs, dtype=np.float32)
+        postings = self._postings.get(term)
+        if postings is None:
+            return mask, scores
+        doc_ids, tfs = postings[0], postings[1]
+        idf = np.log(1 + (n_docs - len(doc_ids) + 0.5) / (len(doc_ids) + 0.5))
+        avg_length = self._doc_lengths.mean() or 1.0
+        norm = BM25_K1 * (1 - BM25_B + BM25_B * self._doc_lengths[doc_ids] / avg_length)
+        mask[doc_ids] = True
+        scores[doc_ids] = idf * tfs * (BM25_K1 + 1) / (tfs + norm)
+        return mask, scores
+
+    def _phrase_scores(self, terms, n_docs):
+        mask, scores = self._term_scores(terms[0], n_docs)
+        for term in terms[1:]:
+            term_mask, term_scores = self._term_scores(term, n_docs)
+            mask &= term_mask
+            scores += term_scores
+        if len(terms) > 1 and mask.any():
+            # Clés doc<<32 | position : la phrase existe si le terme i apparaît à (début + i)
+            starts = self._position_keys(terms[0], mask)
+            for shift, term in enumerate(terms[1:], start=1):
+                starts = starts[np.isin(starts + shift, self._position_keys(term, mask), assume_unique=True)]
+            phrase_mask = np.zeros(n_docs, dtype=bool)
+            phrase_mask[(starts >> POSITION_BITS).astype(np.int64)] = True
+            mask &= phrase_mask
+        return mask, np.where(mask, scores, 0)
+
+    def _position_keys(self, term, doc_mask):
+        doc_ids, tfs, _, positions = self._postings[term]
+        keys = (np.repeat(doc_ids.astype(np.int64), tfs) << POSITION_BITS) | positions
+        # Seuls les CV qui contiennent déjà tous les termes
+        return keys[doc_mask[keys >> POSITION_BITS]]
+
+class _QueryParser:
+    """Descente récursive : or := and (OR and)* ; and := unary ([AND] unary)* ;
+    unary := (NOT|-) unary | ( or ) | "phrase" | terme
+    Un opérande absent ("python OR", "()", '""', ponctuation seule) vaut None : il est ignoré
+    par AND / OR, et une requête qui n'a que des opérandes absents ne renvoie rien."""
+
+    def __init__(self, tokens, index, n_docs):
+        self.tokens = tokens
+        self.pos = 0
+        self.index = index
+        self.n_docs = n_docs
+
+    def _peek(self):
+        return self.tokens[self.pos] if self.pos < len(self.tokens) else None
+
+    def parse(self):
+        result = self._or()
+        if result is None:
+            return np.zeros(self.n_docs, dtype=bool), np.zeros(self.n_docs, dtype=np.float32)
+        return result
+
+    def _or(self):
+        result = self._and()
+        while self._peek() == "OR":
+            self.pos += 1
+            other = self._and()
+            if result is None or other is None:
+                result = result if other is None else other
+            else:
+                result = result[0] | other[0], result[1] + other[1]
+        return result
+
+    def _and(self):
+        result = self._unary()
+        while self._peek() not in (None, "OR", ")"):
+            if self._peek() == "AND":
+                self.pos += 1
+            other = self._unary()
+            if result is None or other is None:
+                result = result if other is None else other
+            else:
+                result = result[0] & other[0], result[1] + other[1]
+        return result
+
+    def _unary(self):
+        token = self._peek()
+        if token in (None, ")", "OR", "AND"):
+            # Opérande manquant : l'opérateur ou la parenthèse est laissé à l'appelant
+            return None
+        self.pos += 1
+        if token == "NOT" or (token.startswith("-") and len(token) > 1):
+            if token != "NOT":
+                # "-java" : on relit le terme sans le tiret
+                self.tokens[self.pos - 1] = token[1:]
+                self.pos -= 1
+            operand = self._unary()
+            if operand is None:
+                return None
+            return ~operand[0], np.zeros(self.n_docs, dtype=np.float32)
+        if token == "(":
+            result = self._or()
+            if self._peek() == ")":
+                self.pos += 1
+            return result
+        terms = tokenize(token.strip('"'))
+        if not terms:
+            return None
+        if token.startswith('"') or len(terms) > 1:
+            return self.index._phrase_scores(terms, self.n_docs)
+        return self.index._term_scores(terms[0], self.n_docs)
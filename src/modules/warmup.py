@@ -0,0 +1,60 @@
+"""
+Model Warm-up : préchargement des modèles Ollama au lancement de l'app
+Le premier CV de la session ne paie plus le temps de chargement.
+"""
+import logging
+import threading
+import time
+
+from .llm_analyzer import create_analyzer
+
+logger = logging.getLogger(__name__)
+
+PENDING = "pending"
+LOADING = "loading"
+READY = "ready"
+FAILED = "failed"
+
+class ModelWarmup:
+    """Charge les modèles texte et vision en tâche de fond (thread daemon)."""
+
+    def __init__(self, analyzer=None):
+        self.analyzer = analyzer or create_analyzer()
+        self.status = {m: PENDING for m in self.analyzer.models}
+        self.load_times = {}
+        self._thread = None
+        self._lock = threading.Lock()
+
+    def start(self):
+        with self._lock:
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name="model-warmup", daemon=True)
+                self._thread.start()
+        return self
+
+    def _run(self):
+        # Texte d'abord : c'est lui qui traite 99% des CV
+        for model in self.analyzer.models:
+            self.status[model] = LOADING
+            start = time.time()
+            ok = self.analyzer.warm_up(model)
+            self.load_times[model] = round(time.time() - start, 1)
+            self.status[model] = READY if ok else FAILED
+            logger.info(f"Warm-up {model}: {self.status[model]} ({self.load_times[model]}s)")
+
+    def is_ready(self, model=None):
+        if model is not None:
+            return self.status.get(model) == READY
+        return all(s == READY for s in self.status.values())
+
+    def refresh(self):
+        """Resynchronise l'état avec Ollama (un modèle a pu être déchargé entre-temps)."""
+        loaded = self.analyzer.loaded_models()
+        for model, state in self.status.items():
+            if state == LOADING:
+                continue
+            if model in loaded or f"{model}:latest" in loaded:
+                self.status[model] = READY
+            elif state == READY:
+                self.status[model] = PENDING
+        return self.status
@@ -0,0 +1,430 @@
+"""
+Load Test : N recruteurs simulés contre app_streamlit.py, sans navigateur (Streamlit AppTest)
+Chaque session charge ses PDF synthétiques et lance une campagne en même temps que les autres ;
+un faux Ollama local répond avec une latence et un nombre de slots réglables.
+Tout tourne dans ce process, comme sur le serveur : caches st.cache_resource partagés,
+RSS mesurée = RSS du serveur Streamlit.
+
+Usage : python tests/simulate_load.py --sessions 1,2,4,8 --cvs 50 --latency 0.2 --slots 1 [--json rapport.json]
+Écrit et mesuré avec streamlit 1.66 : le streamlit==1.32.0 de requirements.txt n'a pas
+AppTest.file_uploader et le script s'arrête alors avec un message (voir check_streamlit).
+"""
+import argparse
+import hashlib
+import json
+import os
+import random
+import statistics
+import sys
+import tempfile
+import threading
+import time
+from collections import Counter
+from contextlib import contextmanager
+from unittest import mock
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+APP_FILE = os.path.join(ROOT, "app_streamlit.py")
+JOB_DESCRIPTION = "Data Engineer senior\nPython, SQL, Airflow, AWS, Docker. 5 ans d'expérience minimum."
+
+FIRST_NAMES = ["Lucas", "Sarah", "Julie", "Marc", "Thomas", "Emma", "Léa", "Pierre", "Ahmed", "Fatima", "Yuki", "Chloé"]
+LAST_NAMES = ["Dubois", "Martin", "Petit", "Durand", "Leroy", "Moreau", "Simon", "Laurent", "Garcia", "David"]
+TITLES = ["Data Engineer", "Data Analyst", "Développeur Python", "Commercial terrain", "Chef de projet", "DevOps"]
+SKILLS = ["Python", "SQL", "Airflow", "AWS", "Docker", "Kubernetes", "Spark", "Excel", "Negociation", "Terraform"]
+
+# ==================== FAUX OLLAMA ====================
+class StubOllama:
+    """Serveur HTTP minimal compatible /api/generate (streaming NDJSON), /api/ps et /api/tags.
+    slots = OLLAMA_NUM_PARALLEL : au-delà, les requêtes attendent comme sur un vrai serveur."""
+
+    def __init__(self, latency=0.2, slots=1, error_rate=0.0, chunks=8, seed=0):
+        self.latency = latency
+        self.error_rate = error_rate
+        self.chunks = chunks
+        self.requests = 0
+        self.errors = 0
+        self.inflight = 0
+        self.max_inflight = 0
+        self._slots = threading.Semaphore(slots)
+        self._lock = threading.Lock()
+        self._random = random.Random(seed)
+        self._server = None
+
+    def start(self):
+        stub = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def log_message(self, *args):
+                pass
+
+            def _send_json(self, status, payload):
+                body = json.dumps(payload).encode("utf-8")
+                self.send_response(status)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def do_GET(self):
+                self._send_json(200, {"models": [{"name": "llama3.2:latest"}, {"name": "llava:latest"}]})
+
+            def do_POST(self):
+                length = int(self.headers.get("Content-Length", 0))
+                request = json.loads(self.rfile.read(length) or b"{}")
+                if not request.get("prompt"):
+                    # Warm-up / changement de keep_alive : modèle "chargé" immédiatement
+                    return self._send_json(200, {"model": request.get("model"), "response": "", "done": True})
+                stub.handle_generate(self, request)
+
+        self._server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        self._server.daemon_threads = True
+        threading.Thread(target=self._server.serve_forever, name="stub-ollama", daemon=True).start()
+        return f"http://127.0.0.1:{self._server.server_address[1]}"
+
+    def stop(self):
+        if self._server is not None:
+            self._server.shutdown()
+
+    def _fake_scores(self, prompt):
+        """Scores déterministes par CV (même prompt -> même résultat)."""
+        seed = int(hashlib.sha256(prompt.encode("utf-8")).hexdigest()[:8], 16)
+        rng = random.Random(seed)
+        return {
+            "nom": f"{rng.choice(FIRST_NAMES)} {rng.choice(LAST_NAMES)}",
+            "titre_profil": rng.choice(TITLES),
+            "email": "",
+            "années_exp": rng.randint(0, 15),
+            "compétences": rng.sample(SKILLS, 3),
+            "n_hard_skills_coeur": rng.randint(0, 65),
+            "n_outils_metier": rng.randint(0, 10),
+            "n_business_impact": rng.randint(0, 10),
+            "n_seniorite": rng.randint(0, 5),
+            "n_soft_skills": rng.randint(0, 3),
+            "n_storytelling": rng.randint(0, 3),
+            "strength": "Stack data en production",
+            "risk": "Impact business non chiffré",
+            "reasoning": "Profil généré par le faux Ollama.",
+        }
+
+    def handle_generate(self, handler, request):
+        with self._lock:
+            self.requests += 1
+            fail = self._random.random() < self.error_rate
+        if fail:
+            with self._lock:
+                self.errors += 1
+            return handler._send_json(500, {"error": "erreur simulée"})
+
+        with self._slots:
+            with self._lock:
+                self.inflight += 1
+                self.max_inflight = max(self.max_inflight, self.inflight)
+            try:
+                text = json.dumps(self._fake_scores(request["prompt"]), ensure_ascii=False)
+                step = max(1, len(text) // self.chunks)
+                handler.send_response(200)
+                handler.send_header("Content-Type", "application/x-ndjson")
+                handler.end_headers()
+                for i in range(0, len(text), step):
+                    time.sleep(self.latency / self.chunks)
+                    handler.wfile.write((json.dumps({"response": text[i:i + step], "done": False}) + "\n").encode("utf-8"))
+                    handler.wfile.flush()
+                duration = int(self.latency * 1e9)
+                final = {
+                    "model": request.get("model"), "response": "", "done": True,
+                    "total_duration": duration, "load_duration": 0,
+                    "prompt_eval_count": len(request["prompt"]) // 4, "prompt_eval_duration": duration // 5,
+                    "eval_count": len(text) // 4, "eval_duration": duration * 4 // 5,
+                }
+                handler.wfile.write((json.dumps(final) + "\n").encode("utf-8"))
+            except (BrokenPipeError, ConnectionResetError):
+                pass # génération annulée côté app
+            finally:
+                with self._lock:
+                    self.inflight -= 1
+
+# ==================== PDF SYNTHÉTIQUES ====================
+def make_pdf(text) -> bytes:
+    """PDF d'une page (Helvetica), lisible par pypdf."""
+    lines = [line.replace("\\", "").replace("(", "").replace(")", "") for line in text.split("\n")]
+    content = "BT /F1 11 Tf 50 750 Td 14 TL " + " ".join(f"({line}) '" for line in lines) + " ET"
+    objects = [
+        "<< /Type /Catalog /Pages 2 0 R >>",
+        "<< /Type /Pages /Kids [3 0 R] /Count 1 >>",
+        "<< /Type /Page /Parent 2 0 R /MediaBox [0 0 612 792] /Contents 4 0 R /Resources << /Font << /F1 5 0 R >> >> >>",
+        f"<< /Length {len(content.encode('latin-1', 'replace'))} >>\nstream\n{content}\nendstream",
+        "<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica /Encoding /WinAnsiEncoding >>",
+    ]
+    out = b"%PDF-1.4\n"
+    offsets = []
+    for number, obj in enumerate(objects, start=1):
+        offsets.append(len(out))
+        out += f"{number} 0 obj\n{obj}\nendobj\n".encode("latin-1", "replace")
+    xref = len(out)
+    out += f"xref\n0 {len(objects) + 1}\n0000000000 65535 f \n".encode()
+    out += "".join(f"{offset:010d} 00000 n \n" for offset in offsets).encode()
+    out += f"trailer\n<< /Size {len(objects) + 1} /Root 1 0 R >>\nstartxref\n{xref}\n%%EOF\n".encode()
+    return out
+
+def synthetic_cvs(session, n_cvs):
+    """[(nom du fichier, octets, type MIME)] au format attendu par AppTest.file_uploader."""
+    rng = random.Random(session)
+    files = []
+    for i in range(n_cvs):
+        name = f"{rng.choice(FIRST_NAMES)} {rng.choice(LAST_NAMES)}"
+        text = "\n".join([
+            name,
+            rng.choice(TITLES),
+            f"{rng.randint(0, 15)} ans d'expérience",
+            "Compétences : " + ", ".join(rng.sample(SKILLS, 4)),
+            f"Projet : migration de {rng.randint(2, 40)} pipelines, gain de {rng.randint(5, 60)}% sur les coûts",
+            f"Référence session {session} CV {i}",
+        ])
+        files.append((f"s{session}_cv{i:03d}.pdf", make_pdf(text), "application/pdf"))
+    return files
+
+# ==================== APPTEST CONCURRENT ====================
+TESTED_STREAMLIT = "1.66"
+
+def check_streamlit():
+    """Message d'erreur si ce Streamlit ne fournit pas ce que le harnais utilise, sinon None :
+    AppTest.file_uploader et les internes remplacés par concurrent_apptest."""
+    import streamlit
+    missing = []
+    try:
+        from streamlit.runtime import Runtime
+        from streamlit.runtime.scriptrunner import script_cache
+        from streamlit.testing.v1 import app_test
+    except ImportError as e:
+        return f"streamlit {streamlit.__version__} : {e}"
+    if not hasattr(app_test.AppTest, "file_uploader"):
+        missing.append("AppTest.file_uploader")
+    for module, name in ((app_test, "Runtime"), (app_test, "ScriptCache"), (script_cache, "ScriptCache")):
+        if not hasattr(module, name):
+            missing.append(f"{module.__name__}.{name}")
+    if not hasattr(Runtime, "_instance"):
+        missing.append("Runtime._instance")
+    if missing:
+        return (
+            f"streamlit {streamlit.__version__} ne fournit pas {', '.join(missing)}. "
+            f"Harnais écrit pour streamlit {TESTED_STREAMLIT} : pip install 'streamlit>={TESTED_STREAMLIT}' dans un environnement dédié."
+        )
+    return None
+
+@contextmanager
+def concurrent_apptest():
+    """AppTest suppose un seul run à la fois : chaque run installe un Runtime factice global
+    puis l'efface (les autres sessions en cours plantent), et recompile le script.
+    Pendant le test de charge, le Runtime installé n'est jamais effacé et le bytecode est partagé."""
+    from streamlit import config
+    from streamlit.runtime import Runtime
+    from streamlit.runtime.scriptrunner.script_cache import ScriptCache
+    from streamlit.testing.v1 import app_test
+
+    class KeepRuntime(type):
+        def __setattr__(cls, name, value):
+            if name != "_instance":
+                return super().__setattr__(name, value)
+            if value is not None:
+                Runtime._instance = value
+
+    shared_cache = ScriptCache() # thread-safe ; évite aussi les ast.parse concurrents
+    previous_flag = config.get_option("global.appTest")
+    config.set_option("global.appTest", True)
+    try:
+        with mock.patch.object(app_test, "Runtime", KeepRuntime("Runtime", (Runtime,), {})), \
+                mock.patch.object(app_test, "ScriptCache", lambda: shared_cache):
+            yield
+    finally:
+        Runtime._instance = None
+        config.set_option("global.appTest", previous_flag)
+
+# ==================== MESURES ====================
+def current_rss():
+    try:
+        import psutil
+        return psutil.Process().memory_info().rss
+    except ImportError:
+        import resource
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024 # pic seulement (Linux : Ko)
+
+class RssSampler:
+    """Pic de mémoire du process pendant un palier de charge."""
+
+    def __init__(self, interval=0.2):
+        self.interval = interval
+        self.start_rss = self.peak_rss = current_rss()
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="rss-sampler", daemon=True)
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            self.peak_rss = max(self.peak_rss, current_rss())
+
+    def __enter__(self):
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        self._stop.set()
+        self._thread.join()
+        self.peak_rss = max(self.peak_rss, current_rss())
+
+def _queue_wait(app):
+    """Attente moyenne par requête affichée dans la barre latérale ("attente moy. 1.2s")."""
+    for element in app.sidebar.markdown:
+        if "attente moy." in element.value:
+            try:
+                return float(element.value.split("attente moy.")[1].split("s")[0])
+            except ValueError:
+                return None
+    return None
+
+def run_session(session, files, start_barrier, timeout):
+    """Une session recruteur : upload, offre, lancement. Renvoie ses mesures."""
+    from streamlit.testing.v1 import AppTest
+    record = _empty_record(session, len(files))
+    try:
+        app = AppTest.from_file(APP_FILE, default_timeout=timeout)
+        app.run()
+        app.sidebar.file_uploader[0].set_value(files)
+        app.sidebar.text_area[0].set_value(JOB_DESCRIPTION)
+        app.sidebar.checkbox[0].set_value(False) # Mode progressif coupé : tous les CV sont notés
+    except Exception as e:
+        # Les autres sessions ne doivent pas attendre celle-ci indéfiniment
+        record["failure"] = f"setup: {type(e).__name__}: {str(e)[:80]}"
+        start_barrier.abort()
+        return record
+    try:
+        start_barrier.wait(timeout)
+    except threading.BrokenBarrierError:
+        record["failure"] = "setup: autre session en échec"
+        return record
+    try:
+        started = time.perf_counter()
+        app.sidebar.button[0].click().run()
+        record["window"] = (started, time.perf_counter())
+        record["latency_s"] = round(record["window"][1] - started, 2)
+        if app.exception:
+            record["failure"] = f"exception: {app.exception[0].message[:80]}"
+        elif app.warning:
+            record["failure"] = f"warning: {app.warning[0].value[:80]}"
+        elif not any("Rapport d'Analyse" in m.value for m in app.markdown):
+            record["failure"] = "no_report"
+        app.run() # Barre latérale à jour : statistiques de file d'attente de la session
+        record["queue_wait_s"] = _queue_wait(app)
+    except RuntimeError as e:
+        record["failure"] = "timeout" if "timed out" in str(e).lower() else f"error: {str(e)[:80]}"
+    except Exception as e:
+        record["failure"] = f"error: {type(e).__name__}: {str(e)[:80]}"
+    return record
+
+def _empty_record(session, n_cvs):
+    return {"session": session, "cvs": n_cvs, "latency_s": None, "queue_wait_s": None, "failure": None}
+
+def _percentile(values, q):
+    if not values:
+        return None
+    ordered = sorted(values)
+    return round(ordered[min(len(ordered) - 1, int(q * len(ordered)))], 2)
+
+def run_level(n_sessions, n_cvs, stub, timeout):
+    """Palier de charge : n_sessions campagnes lancées au même instant."""
+    barrier = threading.Barrier(n_sessions, timeout=timeout)
+    records = [None] * n_sessions
+    file_sets = [synthetic_cvs(session, n_cvs) for session in range(n_sessions)]
+    requests_before, errors_before = stub.requests, stub.errors
+    stub.max_inflight = 0
+
+    def worker(session):
+        try:
+            records[session] = run_session(session, file_sets[session], barrier, timeout)
+        except BaseException as e:
+            barrier.abort()
+            records[session] = dict(_empty_record(session, n_cvs), failure=f"crash: {type(e).__name__}: {str(e)[:80]}")
+
+    with RssSampler() as rss:
+        threads = [threading.Thread(target=worker, args=(s,), name=f"session-{s}") for s in range(n_sessions)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+    records = [r if r is not None else dict(_empty_record(s, n_cvs), failure="crash") for s, r in enumerate(records)]
+    ok = [r for r in records if not r["failure"]]
+    # Débit sur la fenêtre des campagnes (upload et premier rendu exclus)
+    windows = [r.pop("window") for r in records if "window" in r]
+    wall = max(end for _, end in windows) - min(start for start, _ in windows) if windows else 0
+    latencies = [r["latency_s"] for r in ok]
+    waits = [r["queue_wait_s"] for r in ok if r["queue_wait_s"] is not None]
+    return {
+        "sessions": n_sessions,
+        "ok": len(ok),
+        "latency_p50_s": _percentile(latencies, 0.5),
+        "latency_p95_s": _percentile(latencies, 0.95),
+        "latency_max_s": max(latencies) if latencies else None,
+        "queue_wait_avg_s": round(statistics.mean(waits), 2) if waits else None,
+        "cv_per_min": round(len(ok) * n_cvs * 60 / wall, 1) if wall > 0 else 0.0,
+        "rss_start_mb": round(rss.start_rss / 2**20, 1),
+        "rss_peak_mb": round(rss.peak_rss / 2**20, 1),
+        "ollama_requests": stub.requests - requests_before,
+        "ollama_errors": stub.errors - errors_before,
+        "ollama_max_inflight": stub.max_inflight,
+        "failures": dict(Counter(r["failure"].split(":")[0] for r in records if r["failure"])),
+        "session_details": records,
+    }
+
+def main():
+    parser = argparse.ArgumentParser(description="Montée en charge multi-sessions de app_streamlit.py")
+    parser.add_argument("--sessions", default="1,2,4,8", help="Paliers de sessions simultanées (ex: 1,2,4,8)")
+    parser.add_argument("--cvs", type=int, default=50, help="PDF par session")
+    parser.add_argument("--latency", type=float, default=0.2, help="Durée d'une génération du faux Ollama (s)")
+    parser.add_argument("--slots", type=int, default=1, help="Générations parallèles du faux Ollama (OLLAMA_NUM_PARALLEL)")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="Part de réponses HTTP 500 simulées")
+    parser.add_argument("--timeout", type=float, default=600, help="Timeout d'une campagne (s)")
+    parser.add_argument("--slo", type=float, default=120, help="Latence p95 acceptable d'une campagne (s), pour la capacité recommandée")
+    parser.add_argument("--json", help="Écrit le rapport complet dans ce fichier")
+    args = parser.parse_args()
+    problem = check_streamlit()
+    if problem:
+        print(f"❌ {problem}")
+        return 2
+
+    # Avant le premier import de src.modules (fait par l'app dans ce process)
+    stub = StubOllama(latency=args.latency, slots=args.slots, error_rate=args.error_rate)
+    workdir = tempfile.mkdtemp(prefix="hr_load_")
+    os.environ["OLLAMA_URL"] = stub.start()
+    os.environ["OLLAMA_NUM_PARALLEL"] = str(args.slots)
+    os.environ["HR_HISTORY_DIR"] = os.path.join(workdir, "history")
+    os.environ["HR_TALENT_INDEX_DIR"] = os.path.join(workdir, "talent_index")
+    os.environ["HR_OLLAMA_PROFILES"] = os.path.join(workdir, "ollama_profiles.json")
+
+    print(f"🧪 Faux Ollama {os.environ['OLLAMA_URL']} • {args.latency}s/CV • {args.slots} slot(s) • {args.cvs} CV par session")
+    print(f"{'sessions':>8} {'ok':>4} {'p50 (s)':>8} {'p95 (s)':>8} {'max (s)':>8} {'attente':>8} {'CV/min':>8} {'RSS (Mo)':>10} {'err. LLM':>9} {'échecs'}")
+    report = []
+    try:
+        with concurrent_apptest():
+            for n_sessions in [int(n) for n in args.sessions.split(",")]:
+                level = run_level(n_sessions, args.cvs, stub, args.timeout)
+                report.append(level)
+                print(
+                    f"{level['sessions']:>8} {level['ok']:>4} {level['latency_p50_s'] or '-':>8} {level['latency_p95_s'] or '-':>8} "
+                    f"{level['latency_max_s'] or '-':>8} {level['queue_wait_avg_s'] if level['queue_wait_avg_s'] is not None else '-':>8} "
+                    f"{level['cv_per_min']:>8} {level['rss_peak_mb']:>10} {level['ollama_errors']:>9} {level['failures'] or '-'}"
+                )
+    finally:
+        stub.stop()
+
+    # Capacité = plus grand palier sans échec de session et sous le SLO de latence
+    healthy = [l["sessions"] for l in report if not l["failures"] and (l["latency_p95_s"] or 0) <= args.slo]
+    if healthy:
+        print(f"✅ Capacité mesurée : {max(healthy)} sessions simultanées (p95 ≤ {args.slo}s, aucun échec)")
+    else:
+        print(f"❌ Aucun palier ne tient le SLO de {args.slo}s sans échec")
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump(report, f, ensure_ascii=False, indent=2)
+        print(f"💾 Rapport détaillé : {args.json}")
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,92 @@
+"""
+Test suite for Ollama auto-tuning and per-host profiles
+"""
+
+import os
+import tempfile
+import threading
+import time
+import unittest
+from unittest import mock
+from src.modules import ollama_profile
+from src.modules.autotune import evaluate, is_better, tune
+from src.modules.llm_analyzer import LLMAnalyzer
+
+
+def fake_evaluate(profile, job_desc, references):
+    """Plus petit contexte = plus rapide ; 2048 tronque les CV et dégrade les scores."""
+    options = profile["options"]
+    speed = 100000 / options["num_ctx"] + 1000 / options["num_predict"] + 10 * profile["num_parallel"]
+    if profile["text_model"] == "llama3.2:1b":
+        speed *= 2
+    mae = 20.0 if options["num_ctx"] < 3072 or profile["text_model"] == "llama3.2:1b" else 4.0
+    return {"cv_per_min": speed, "mae": mae, "failures": 0, "tokens_per_s": 0.0, "load_seconds": 0.0}
+
+
+class TestAutotune(unittest.TestCase):
+    """Test profile persistence and the option sweep."""
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.tmp.name, "ollama_profiles.json")
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def test_profiles_are_per_host(self):
+        ollama_profile.save_profile({"text_model": "a"}, host="gpu-box", path=self.path)
+        ollama_profile.save_profile({"text_model": "b"}, host="default", path=self.path)
+        assert ollama_profile.load_profile(host="gpu-box", path=self.path)["text_model"] == "a"
+        assert ollama_profile.load_profile(host="laptop", path=self.path)["text_model"] == "b"
+
+    def test_analyzer_loads_host_profile(self):
+        profile = {"text_model": "llama3.2:3b-instruct-q4_K_M", "options": {"num_ctx": 3072, "num_thread": 4}, "keep_alive": "30m"}
+        ollama_profile.save_profile(profile, host=ollama_profile.current_host(), path=self.path)
+        with mock.patch.object(ollama_profile, "DEFAULT_PROFILES_PATH", self.path):
+            llm = LLMAnalyzer()
+        assert llm.text_model == "llama3.2:3b-instruct-q4_K_M"
+        assert llm.options["num_ctx"] == 3072
+        assert llm.options["num_thread"] == 4
+        assert llm.options["temperature"] == 0.0
+        assert llm.keep_alive == "30m"
+
+    def test_parallel_evaluate_uses_one_analyzer_per_cv(self):
+        in_use, overlaps = set(), []
+        lock = threading.Lock()
+
+        def fake_score_cv(text, job_desc, llm, file_name=""):
+            with lock:
+                overlaps.append(id(llm) in in_use)
+                in_use.add(id(llm))
+            time.sleep(0.02 if file_name == "cv0" else 0.001) # cv0 finit après cv1
+            llm.last_metrics = {"eval_count": len(text)}
+            with lock:
+                in_use.discard(id(llm))
+            return {"nom": file_name, "score_final": 50, "eval_count": llm.last_metrics["eval_count"]}
+
+        profile = {"text_model": "llama3.2", "options": {"num_ctx": 4096}, "num_parallel": 2}
+        references = [(f"cv{i}", "x" * (i + 1), 50.0) for i in range(6)]
+        with mock.patch("src.modules.autotune.score_cv", fake_score_cv), \
+                mock.patch.object(LLMAnalyzer, "warm_up", return_value=True):
+            measured = evaluate(profile, "offre", references)
+        assert not any(overlaps)
+        assert measured["mae"] == 0.0 and measured["failures"] == 0
+
+    def test_faster_profile_must_stay_accurate(self):
+        fast_but_wrong = {"cv_per_min": 50.0, "mae": 20.0, "failures": 0}
+        accurate = {"cv_per_min": 10.0, "mae": 3.0, "failures": 0}
+        assert is_better(accurate, fast_but_wrong, max_mae=8.0)
+        assert not is_better(fast_but_wrong, accurate, max_mae=8.0)
+
+    def test_tune_picks_fastest_accurate_profile(self):
+        best, trials = tune("offre", [], models=["llama3.2:1b", "llama3.2:3b"], evaluate_fn=fake_evaluate)
+        assert best["text_model"] == "llama3.2:3b"
+        assert best["options"]["num_ctx"] == 3072
+        assert best["options"]["num_predict"] == 400
+        assert best["num_parallel"] == 4
+        assert best["measured"]["mae"] == 4.0
+        assert len(trials) == len({str(t) for t, _ in trials})
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,93 @@
+"""
+Test suite for run-scoped campaign cancellation
+"""
+
+import threading
+import unittest
+from src.modules import cancellation
+from src.modules.cancellation import (
+    SESSION_TTL_SECONDS, CampaignCancelled, CancelToken, cancelled_tokens, new_campaign_token, reclaimed_summary,
+)
+from src.modules.ranking import AnytimeRanker
+from src.modules.scheduler import InferenceScheduler
+
+
+class FakeResponse:
+    def __init__(self):
+        self.closed = False
+
+    def close(self):
+        self.closed = True
+
+
+class TestCancelToken(unittest.TestCase):
+    """Test token lifecycle and reclaimed compute accounting."""
+
+    def test_cancel_closes_in_flight_streams(self):
+        token = CancelToken("s")
+        response = FakeResponse()
+        token.register(response)
+        token.cancel()
+        assert response.closed
+        with self.assertRaises(CampaignCancelled):
+            token.check()
+
+    def test_new_campaign_supersedes_previous(self):
+        first = new_campaign_token("session-supersede")
+        first.record_aborted(elapsed=10.0, tokens_generated=42)
+        second = new_campaign_token("session-supersede")
+
+        assert first.cancelled and first.reason == "superseded"
+        assert not second.cancelled
+        summary = reclaimed_summary("session-supersede", avg_request_seconds=30.0)
+        assert summary["aborted_generations"] == 1
+        assert summary["reclaimed_seconds"] == 20.0
+
+    def test_idle_sessions_are_pruned(self):
+        new_campaign_token("session-idle")
+        current = new_campaign_token("session-idle")
+        assert len(cancelled_tokens("session-idle")) == 1
+        current.last_active_at -= SESSION_TTL_SECONDS + 1
+
+        new_campaign_token("session-other")
+        assert "session-idle" not in cancellation._active_tokens
+        assert cancelled_tokens("session-idle") == []
+
+    def test_queued_requests_are_dropped(self):
+        scheduler = InferenceScheduler(max_concurrency=1)
+        token = CancelToken("B")
+        errors = []
+
+        def queued():
+            try:
+                with scheduler.slot("B", cancel_token=token):
+                    pass
+            except CampaignCancelled:
+                errors.append("cancelled")
+
+        with scheduler.slot("A"):
+            worker = threading.Thread(target=queued)
+            worker.start()
+            token.cancel()
+            worker.join(5)
+
+        assert errors == ["cancelled"]
+        assert token.dropped_requests == 1
+        assert scheduler.snapshot()["waiting"] == 0
+
+    def test_ranker_stops_and_drops_remaining(self):
+        token = CancelToken("s")
+
+        def cancel_after_first(text, job_desc, llm=None, file_name=""):
+            token.cancel()
+            return {"nom": file_name, "score_final": 10}
+
+        candidates = [("cv%d.pdf" % i, "Python SQL " * 10) for i in range(4)]
+        ranker = AnytimeRanker(candidates, "Python SQL", top_k=4, score_fn=cancel_after_first, cancel_token=token)
+        with self.assertRaises(CampaignCancelled):
+            ranker.run()
+        assert token.dropped_requests == 3
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,60 @@
+"""
+Test suite for the columnar campaign history store
+"""
+
+import datetime
+import tempfile
+import unittest
+from src.modules.history_store import CampaignHistoryStore
+
+
+def make_results(n_coeur_values):
+    return [
+        {"nom": f"Candidat {i}", "score_final": n + 20, "n_coeur": n, "compétences": ["Python", "SQL"], "text_hash": f"h{i}"}
+        for i, n in enumerate(n_coeur_values)
+    ]
+
+
+class TestCampaignHistoryStore(unittest.TestCase):
+    """Test append-only writes and cross-campaign queries."""
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.store = CampaignHistoryStore(self.tmp.name)
+        today = datetime.datetime.now()
+        self.store.append("data-recent", make_results([60, 40]), role="Data Engineer", scored_at=today)
+        self.store.append("data-old", make_results([65]), role="Data Scientist", scored_at=today - datetime.timedelta(days=400))
+        self.store.append("sales", make_results([55]), role="Commercial B2B", scored_at=today)
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def test_cross_campaign_query(self):
+        df = self.store.query(min_scores={"n_coeur": 50}, role="data", since=datetime.timedelta(days=183))
+        assert df["campaign_id"].tolist() == ["data-recent"]
+        assert df["n_coeur"].tolist() == [60]
+        assert df["competences"].iloc[0].tolist() == ["Python", "SQL"]
+
+    def test_llm_subscore_names_are_accepted(self):
+        df = self.store.query(min_scores={"n_hard_skills_coeur": 50}, role="data", since=datetime.timedelta(days=183))
+        assert df["n_coeur"].tolist() == [60]
+        with self.assertRaises(ValueError):
+            self.store.query(min_scores={"n_inconnu": 1})
+
+    def test_column_projection_and_partitions(self):
+        df = self.store.query(campaign_id="data-old", columns=["nom", "date"])
+        assert list(df.columns) == ["nom", "date"]
+        assert len(df) == 1
+
+    def test_manifest_survives_reopen(self):
+        reopened = CampaignHistoryStore(self.tmp.name)
+        assert [c[1] for c in reopened.campaigns()] == ["data-old", "data-recent", "sales"]
+        assert len(reopened.query()) == 4
+
+    def test_empty_store(self):
+        with tempfile.TemporaryDirectory() as empty:
+            assert CampaignHistoryStore(empty).query(min_scores={"n_coeur": 50}).empty
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,81 @@
+"""
+Test suite for streaming spreadsheet ingestion
+"""
+
+import os
+import tempfile
+import unittest
+import pandas as pd
+from src.modules.ingestion import ingest_candidates, iter_candidate_chunks, read_sheet_config
+
+
+def write_workbook(path, n_rows):
+    df = pd.DataFrame({
+        "nom": [f"Candidat {i}" for i in range(n_rows)],
+        "email": [f"c{i}@example.com" for i in range(n_rows)],
+        "années_exp": [i % 12 for i in range(n_rows)],
+        "compétences": ["Python, SQL, AWS" if i % 10 == 0 else "Excel" for i in range(n_rows)],
+        "disponibilité": ["Immédiat" if i % 2 else "Dans 3 mois" for i in range(n_rows)],
+    })
+    with pd.ExcelWriter(path) as writer:
+        df.to_excel(writer, sheet_name="Candidats", index=False)
+        config = {"Key": ["required_skills", "min_years_exp", "worksheet_target"], "Value": ["Python, SQL, AWS", "2", "Candidats"]}
+        pd.DataFrame(config).to_excel(writer, sheet_name="_CONFIG", index=False, header=False)
+
+
+class TestIngestion(unittest.TestCase):
+    """Test _CONFIG parsing and chunked scoring."""
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.xlsx = os.path.join(self.tmp.name, "export.xlsx")
+        write_workbook(self.xlsx, 250)
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def test_read_config_sheet(self):
+        config = read_sheet_config(self.xlsx)
+        assert config["required_skills"] == ["Python", "SQL", "AWS"]
+        assert config["min_years_exp"] == 2.0
+        assert config["worksheet_target"] == "Candidats"
+
+    def test_chunks_have_fixed_size(self):
+        sizes = [len(chunk) for chunk in iter_candidate_chunks(self.xlsx, chunk_size=100)]
+        assert sizes == [100, 100, 50]
+
+    def test_ingest_keeps_only_top_n(self):
+        top, stats, _ = ingest_candidates(self.xlsx, chunk_size=64, top_n=5)
+        assert stats["total_candidates"] == 250
+        assert len(top) == 5
+        assert all(m.match_percentage == 100.0 for m in top)
+        assert top[0].overall_rank_score >= top[-1].overall_rank_score
+
+    def test_csv_source(self):
+        csv_path = os.path.join(self.tmp.name, "export.csv")
+        pd.read_excel(self.xlsx, sheet_name="Candidats").to_csv(csv_path, index=False)
+        top, stats, config = ingest_candidates(csv_path, chunk_size=100, config={"required_skills": ["Python"]})
+        assert config == {"required_skills": ["Python"]}
+        assert stats["total_candidates"] == 250
+
+    def test_csv_and_xlsx_parse_traps_alike(self):
+        # Pièges de generate_dataset.py : négatif et texte libre dans années_exp
+        df = pd.DataFrame({
+            "nom": ["Négatif", "Texte", "Normal"],
+            "email": ["a@example.com", "b@example.com", "c@example.com"],
+            "années_exp": [-5, "dix ans", 4],
+            "compétences": ["Python", "Python", "Python"],
+            "disponibilité": ["Immédiat"] * 3,
+        })
+        csv_path = os.path.join(self.tmp.name, "pieges.csv")
+        xlsx_path = os.path.join(self.tmp.name, "pieges.xlsx")
+        df.to_csv(csv_path, index=False)
+        df.to_excel(xlsx_path, sheet_name="Candidats", index=False)
+        for path in (csv_path, xlsx_path):
+            top, _, _ = ingest_candidates(path, config={"required_skills": ["Python"]})
+            years = {m.name: m.years_experience for m in top}
+            assert years == {"Négatif": 0.0, "Texte": 0.0, "Normal": 4.0}, (path, years)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -22,6 +22,8 @@ class TestKPICalculator(unittest.TestCase):
         assert self.calculator._parse_years_experience("5 ans") == 5.0
         assert self.calculator._parse_years_experience("5-7 years") == 5.0
         assert self.calculator._parse_years_experience("") == 0.0
+        assert self.calculator._parse_years_experience("-5") == 0.0
+        assert self.calculator._parse_years_experience(-5) == 0.0
     
     def test_experience_score(self):
         """Test experience scoring."""
@@ -0,0 +1,76 @@
+"""
+Test suite for LLM record/replay cassettes
+"""
+
+import json
+import os
+import tempfile
+import threading
+import time
+import unittest
+from unittest import mock
+from src.modules.cancellation import CampaignCancelled, CancelToken
+from src.modules.llm_analyzer import LLMAnalyzer, ResponseWrapper
+from src.modules.llm_cassette import Cassette, RecordingAnalyzer, ReplayAnalyzer
+from src.modules.scoring import score_cv
+
+CV_TEXT = "Alice Martin - Data Engineer, 6 ans. Python, SQL, Airflow, AWS. Migration de 40 pipelines."
+LLM_JSON = json.dumps({"nom": "Alice Martin", "n_hard_skills_coeur": 80, "n_outils_metier": 7, "n_business_impact": 6})
+METRICS = {"eval_count": 120, "eval_duration": 900000000, "prompt_eval_count": 800}
+
+
+def fake_live_response(analyzer, payload):
+    analyzer.last_metrics = dict(METRICS)
+    return ResponseWrapper(LLM_JSON)
+
+
+class TestLLMCassette(unittest.TestCase):
+    """Test recording, instant and timed replay, and cache misses."""
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.tmp.name, "llm.jsonl.gz")
+        with mock.patch.object(LLMAnalyzer, "_post_streaming", fake_live_response):
+            score_cv(CV_TEXT, "Data Engineer", RecordingAnalyzer(Cassette(self.path)))
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def test_record_then_replay_offline(self):
+        cassette = Cassette(self.path)
+        assert len(cassette) == 1
+        result = score_cv(CV_TEXT, "Data Engineer", ReplayAnalyzer(cassette))
+        assert result["nom"] == "Alice Martin"
+        assert result["n_coeur"] == 65 # plafonné par le barème
+        assert result["score_final"] == 78
+        assert result["eval_count"] == 120
+        assert cassette.hits == 1 and cassette.misses == 0
+
+    def test_unknown_prompt_is_a_miss(self):
+        cassette = Cassette(self.path)
+        result = score_cv(CV_TEXT + " (version 2)", "Data Engineer", ReplayAnalyzer(cassette))
+        assert result["score_final"] == 0
+        assert cassette.misses == 1
+
+    def test_replay_with_recorded_latency(self):
+        cassette = Cassette(self.path)
+        entry = next(iter(cassette.entries.values()))
+        entry["elapsed_s"] = 0.2
+        start = time.perf_counter()
+        score_cv(CV_TEXT, "Data Engineer", ReplayAnalyzer(cassette, latency_scale=0.5))
+        assert time.perf_counter() - start >= 0.1
+
+    def test_timed_replay_honours_cancellation(self):
+        cassette = Cassette(self.path)
+        next(iter(cassette.entries.values()))["elapsed_s"] = 30
+        llm = ReplayAnalyzer(cassette, latency_scale=1.0)
+        llm.cancel_token = CancelToken("s1")
+        threading.Timer(0.1, llm.cancel_token.cancel, args=("test",)).start()
+        start = time.perf_counter()
+        with self.assertRaises(CampaignCancelled):
+            score_cv(CV_TEXT, "Data Engineer", llm)
+        assert time.perf_counter() - start < 5
+
+
+if __name__ == "__main__":
+    unittest.main()
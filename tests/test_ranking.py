@@ -0,0 +1,84 @@
+"""
+Test suite for the anytime ranking (early stop on a stable top-K)
+"""
+
+import contextlib
+import unittest
+from unittest import mock
+from src.modules.cancellation import CancelToken
+from src.modules.ranking import AnytimeRanker, upper_bound, _keywords
+from src.modules.scoring import MAX_SCORE, apply_scores
+
+
+JOB = "Data Engineer : Python, SQL, Airflow, Docker, AWS"
+STRONG_CV = "Data Engineer senior. Python, SQL, Airflow, Docker et AWS en production depuis 6 ans."
+WEAK_CV = "Commercial terrain, prospection et négociation grands comptes depuis 6 ans."
+
+
+class TestUpperBound(unittest.TestCase):
+    """Test the cheap upper-bound estimate."""
+
+    def test_unreadable_cv_is_zero(self):
+        assert upper_bound("", _keywords(JOB)) == 0
+
+    def test_bound_follows_keyword_overlap(self):
+        job_keywords = _keywords(JOB)
+        assert upper_bound(STRONG_CV, job_keywords) == MAX_SCORE
+        assert upper_bound(WEAK_CV, job_keywords) < upper_bound(STRONG_CV, job_keywords)
+
+
+class TestAnytimeRanker(unittest.TestCase):
+    """Test priority order and early stop."""
+
+    def setUp(self):
+        self.scored = []
+
+        def fake_score(text, job_desc, llm=None, file_name=""):
+            self.scored.append(file_name)
+            coeur = 60 if "Python" in text else 5
+            return apply_scores({"nom": file_name, "n_hard_skills_coeur": coeur})
+
+        self.fake_score = fake_score
+
+    def test_strong_candidates_are_scored_first(self):
+        ranker = AnytimeRanker([("weak.pdf", WEAK_CV), ("strong.pdf", STRONG_CV)], JOB, top_k=1, score_fn=self.fake_score)
+        ranker.step()
+        assert self.scored == ["strong.pdf"]
+
+    def test_stops_once_top_k_is_stable(self):
+        candidates = [("weak_%d.pdf" % i, WEAK_CV) for i in range(5)] + [("strong.pdf", STRONG_CV)]
+        ranker = AnytimeRanker(candidates, JOB, top_k=1, score_fn=self.fake_score)
+        results = ranker.run()
+
+        assert self.scored == ["strong.pdf"]
+        assert ranker.remaining == 5
+        assert ranker.unscored() == ["weak_%d.pdf" % i for i in range(5)]
+        assert results[0]["nom"] == "strong.pdf"
+
+    def test_full_run_without_early_stop(self):
+        candidates = [("weak.pdf", WEAK_CV), ("strong.pdf", STRONG_CV), ("empty.pdf", "")]
+        ranker = AnytimeRanker(candidates, JOB, top_k=1, score_fn=self.fake_score)
+        results = ranker.run(stop_when_stable=False)
+
+        assert ranker.done
+        assert [r["nom"] for r in results] == ["strong.pdf", "weak.pdf", "empty.pdf"]
+
+    def test_cancelled_background_run_still_reports_scored(self):
+        token = CancelToken("s")
+
+        def cancel_after_first(text, job_desc, llm=None, file_name=""):
+            token.cancel()
+            return self.fake_score(text, job_desc, llm, file_name)
+
+        archived = []
+        candidates = [("weak_%d.pdf" % i, WEAK_CV) for i in range(3)]
+        ranker = AnytimeRanker(candidates, JOB, top_k=1, score_fn=cancel_after_first, cancel_token=token)
+        ranker.on_background_done = lambda r: archived.extend(r.scored_since(0))
+        with mock.patch("src.modules.ranking.pinned_models", lambda llm: contextlib.nullcontext(llm)):
+            ranker.continue_in_background().join(5)
+
+        assert [r["nom"] for r in archived] == ["weak_0.pdf"]
+
+
+if __name__ == "__main__":
+    unittest.main()
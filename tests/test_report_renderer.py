@@ -0,0 +1,58 @@
+"""
+Test suite for the static HTML report renderer
+"""
+
+import unittest
+from src.modules.report_renderer import radar_svg, render_report_html
+
+
+def make_result(i):
+    return {
+        "nom": f"Candidat {i}", "titre_profil": "Data Engineer", "email": f"c{i}@example.com",
+        "années_exp": i % 12, "compétences": ["Python", "SQL"],
+        "n_coeur": i % 66, "n_outils": i % 11, "n_imp": i % 11, "n_sen": i % 6, "n_soft": 3, "n_story": 3,
+        "score_final": i % 66 + i % 11 + i % 11 + i % 6 + 6,
+        "reasoning": "Stack data solide, impact peu chiffré.", "strength": "Airflow", "risk": "Pas de Kubernetes",
+    }
+
+
+class TestReportRenderer(unittest.TestCase):
+    """Test the self-contained report output."""
+
+    def test_report_is_self_contained(self):
+        page = render_report_html([make_result(i) for i in range(20)], role="Data Engineer")
+        assert page.startswith("<!DOCTYPE html>")
+        assert "<script" not in page
+        assert "plotly" not in page.lower()
+        assert page.count("<details") == 20
+        assert page.count('<use href="#radar-grid"/>') == 21 # 20 candidats + recommandation n°1
+
+    def test_candidates_sorted_and_escaped(self):
+        results = [dict(make_result(1), nom="<b>Bob</b>", score_final=10), dict(make_result(2), nom="Alice", score_final=90)]
+        page = render_report_html(results)
+        assert page.index("Alice") < page.index("&lt;b&gt;Bob&lt;/b&gt;")
+        assert "<b>Bob</b>" not in page
+
+    def test_unscored_cvs_listed_and_kpi_relabelled(self):
+        page = render_report_html([make_result(1)], volume=3, unscored=["ml_engineer.pdf", "<x>.pdf"])
+        assert "Moyenne des CV notés" in page
+        assert "Moyenne du pool" not in page
+        assert "CV non analysés (2)" in page
+        assert "ml_engineer.pdf" in page and "&lt;x&gt;.pdf" in page
+
+    def test_radar_points_are_capped(self):
+        full = radar_svg({"n_coeur": 65, "n_outils": 10, "n_imp": 10, "n_sen": 5, "n_soft": 5, "n_story": 5})
+        over = radar_svg({"n_coeur": 200, "n_outils": 10, "n_imp": 10, "n_sen": 5, "n_soft": 5, "n_story": 5})
+        assert full == over
+        assert "110.0,33.0" in full # premier axe vers le haut, rayon plein
+
+    def test_large_campaign_stays_compact(self):
+        # Le temps de rendu est mesuré par le bench (python -m src.modules.llm_cassette bench), pas ici
+        page = render_report_html([make_result(i) for i in range(2000)])
+        assert page.count("<details") == 2000
+        assert page.count("<g id=\"radar-grid\"") == 1 # toile partagée, pas recopiée par candidat
+        assert len(page.encode("utf-8")) < 5 * 1024 * 1024
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,89 @@
+"""
+Test suite for the shared inference scheduler
+"""
+
+import threading
+import time
+import unittest
+from src.modules.scheduler import SESSION_TTL_SECONDS, InferenceScheduler, SessionStats
+
+
+class TestInferenceScheduler(unittest.TestCase):
+    """Test bounded concurrency and round-robin fairness."""
+
+    def test_round_robin_between_sessions(self):
+        scheduler = InferenceScheduler(max_concurrency=1)
+        order = []
+        release = threading.Event()
+
+        def hold_slot():
+            with scheduler.slot("blocker"):
+                release.wait(5)
+
+        def submit(session_id):
+            with scheduler.slot(session_id):
+                order.append(session_id)
+
+        blocker = threading.Thread(target=hold_slot)
+        blocker.start()
+        while scheduler.snapshot()["active"] == 0:
+            time.sleep(0.01)
+
+        # La session A empile 3 requêtes avant que B n'arrive
+        workers = []
+        for session_id in ["A", "A", "A", "B"]:
+            worker = threading.Thread(target=submit, args=(session_id,))
+            worker.start()
+            workers.append(worker)
+            while scheduler.snapshot()["waiting"] < len(workers):
+                time.sleep(0.01)
+
+        assert scheduler.queue_position("B") == 2
+        release.set()
+        for worker in [blocker] + workers:
+            worker.join(5)
+
+        assert order == ["A", "B", "A", "A"]
+        assert scheduler.stats["A"].completed == 3
+        assert scheduler.snapshot()["active"] == 0
+
+    def test_abandoned_wait_frees_the_queue(self):
+        scheduler = InferenceScheduler(max_concurrency=1)
+
+        def interrupt(position, eta):
+            raise KeyboardInterrupt
+
+        with scheduler.slot("A"):
+            with self.assertRaises(KeyboardInterrupt):
+                with scheduler.slot("B", on_wait=interrupt):
+                    pass
+        assert scheduler.snapshot()["waiting"] == 0
+        assert scheduler.snapshot()["active"] == 0
+
+
+class TestSessionStats(unittest.TestCase):
+    """Test per-session throughput and pruning."""
+
+    def test_idle_gap_between_campaigns_is_not_counted(self):
+        stats = SessionStats()
+        for campaign_start in (0.0, 3600.0):
+            # Campagne de 10 CV, 6 s par CV, requêtes enchaînées
+            for i in range(10):
+                stats._begin(campaign_start + i * 6)
+                stats.completed += 1
+                stats._end(campaign_start + i * 6 + 6)
+        assert stats.active_seconds == 120.0
+        assert stats.throughput_per_min == 10.0
+
+    def test_idle_session_stats_are_pruned(self):
+        scheduler = InferenceScheduler(max_concurrency=1)
+        with scheduler.slot("old"):
+            pass
+        scheduler.stats["old"].last_request_at -= SESSION_TTL_SECONDS + 1
+        with scheduler.slot("new"):
+            pass
+        assert set(scheduler.stats) == {"new"}
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,154 @@
+"""
+Test suite for the inverted talent index
+"""
+
+import json
+import os
+import shutil
+import tempfile
+import unittest
+from unittest import mock
+from src.modules import talent_index
+from src.modules.talent_index import TalentIndex, tokenize
+
+
+DOCS = [
+    {"text": "Data Engineer senior. Python, SQL, AWS et Airflow.", "nom": "Alice"},
+    {"text": "Développeur C++ embarqué, un peu de Python.", "nom": "Bruno"},
+    {"text": "Engineer data junior, Docker, Node.js.", "nom": "Chloé"},
+    {"text": "Python Python Python : data scientist, expérience .NET et C#.", "nom": "David"},
+]
+
+
+def names(results):
+    return sorted(meta["nom"] for _, meta in results)
+
+
+class TestTalentIndex(unittest.TestCase):
+    """Test tokenization, boolean queries, phrases and persistence."""
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.index = TalentIndex(self.tmp.name)
+        self.index.add_documents(DOCS)
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def test_tokenize_keeps_technical_terms(self):
+        tokens = tokenize("Développeur C++ / Node.js, .NET et C#.")
+        assert tokens == ["developpeur", "c++", "node.js", ".net", "et", "c#"]
+
+    def test_accents_are_ignored(self):
+        assert names(self.index.search("developpeur")) == ["Bruno"]
+        assert names(self.index.search("Expérience")) == ["David"]
+
+    def test_ligatures_and_non_ascii_letters(self):
+        assert tokenize("Mise en œuvre, Łukasz") == ["mise", "en", "oeuvre", "lukasz"]
+        self.index.add_documents([{"text": "Mise en œuvre du cœur de métier, équipe de Łukasz.", "nom": "Emma"}])
+        assert names(self.index.search("oeuvre")) == ["Emma"]
+        assert names(self.index.search('"mise en œuvre" lukasz')) == ["Emma"]
+
+    def test_boolean_operators(self):
+        assert names(self.index.search("python sql")) == ["Alice"]
+        assert names(self.index.search("c++ OR node.js")) == ["Bruno", "Chloé"]
+        assert names(self.index.search("python -c++")) == ["Alice", "David"]
+        assert names(self.index.search("(docker OR aws) AND NOT junior")) == ["Alice"]
+
+    def test_missing_operand_matches_nothing(self):
+        python = ["Alice", "Bruno", "David"]
+        assert names(self.index.search("python OR")) == python
+        assert names(self.index.search("OR python")) == python
+        assert names(self.index.search("python / sql")) == ["Alice"]
+        assert self.index.search("()") == []
+        assert self.index.search('""') == []
+        assert self.index.search("NOT") == []
+
+    def test_phrase_query(self):
+        assert names(self.index.search('"data engineer"')) == ["Alice"]
+        assert names(self.index.search("data engineer")) == ["Alice", "Chloé"]
+
+    def test_bm25_ranks_frequent_term_first(self):
+        results = self.index.search("python")
+        assert results[0][1]["nom"] == "David"
+        assert results[0][0] > results[-1][0]
+
+    def test_reopen_and_deduplicate(self):
+        added = self.index.add_documents(DOCS[:1] + [{"text": "Consultant SAP FI/CO", "nom": "Emma"}])
+        assert added == 1
+        reopened = TalentIndex(self.tmp.name)
+        assert len(reopened.docs) == 5
+        assert names(reopened.search("sap")) == ["Emma"]
+        assert names(reopened.search('"data engineer"')) == ["Alice"]
+
+
+class TestTalentIndexRecovery(unittest.TestCase):
+    """Test realignment of docs.jsonl and segments after an interrupted write."""
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.docs_path = os.path.join(self.tmp.name, "docs.jsonl")
+        TalentIndex(self.tmp.name).add_documents(DOCS[:2])
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def test_failed_segment_write_is_rolled_back_and_retried(self):
+        index = TalentIndex(self.tmp.name)
+        with mock.patch.object(TalentIndex, "_write_segment", side_effect=OSError("disque plein")):
+            with self.assertRaises(OSError):
+                index.add_documents(DOCS[2:])
+        assert index.add_documents(DOCS[2:]) == 2 # pas de hash retenu pour le lot perdu
+        reopened = TalentIndex(self.tmp.name)
+        assert len(reopened.docs) == 4
+        assert names(reopened.search("python")) == ["Alice", "Bruno", "David"]
+
+    def test_docs_without_segment_are_dropped(self):
+        # Arrêt brutal entre docs.jsonl et le segment : une ligne complète, une tronquée
+        with open(self.docs_path, "a", encoding="utf-8") as f:
+            f.write(json.dumps({"nom": "Chloé", "doc_id": 2, "text_hash": "x", "length": 3}) + "\n")
+            f.write('{"nom": "Dav')
+        reopened = TalentIndex(self.tmp.name)
+        assert len(reopened.docs) == 2
+        assert names(reopened.search("python")) == ["Alice", "Bruno"]
+        assert reopened.add_documents(DOCS[2:]) == 2
+        assert names(TalentIndex(self.tmp.name).search("junior")) == ["Chloé"]
+
+    def test_orphan_postings_are_ignored(self):
+        with open(self.docs_path, encoding="utf-8") as f:
+            first = f.readline()
+        with open(self.docs_path, "w", encoding="utf-8") as f:
+            f.write(first)
+        reopened = TalentIndex(self.tmp.name)
+        assert names(reopened.search("python")) == ["Alice"]
+        assert reopened.search("c++") == []
+        reopened.add_documents([{"text": "Consultant SAP FI/CO", "nom": "Emma"}])
+        again = TalentIndex(self.tmp.name)
+        assert names(again.search("c++ OR sap")) == ["Emma"]
+
+    def test_interrupted_compaction_keeps_one_copy(self):
+        index = TalentIndex(self.tmp.name)
+        segments_dir = os.path.join(self.tmp.name, "segments")
+        live = sorted(os.listdir(segments_dir))
+        with mock.patch.object(talent_index, "MAX_SEGMENTS", 1), mock.patch("os.remove", side_effect=OSError("arrêt brutal")):
+            index.add_documents(DOCS[2:]) # 2 segments -> compaction, anciens fichiers restés sur disque
+        assert set(live) < set(os.listdir(segments_dir))
+
+        reopened = TalentIndex(self.tmp.name)
+        assert len(os.listdir(segments_dir)) == 1
+        results = reopened.search("python")
+        assert names(results) == ["Alice", "Bruno", "David"]
+        assert all(score > 0 for score, _ in results)
+
+    def test_unpublished_segment_is_ignored(self):
+        # Compaction coupée avant la bascule du manifeste : copie fusionnée non publiée
+        segments_dir = os.path.join(self.tmp.name, "segments")
+        (live,) = os.listdir(segments_dir)
+        shutil.copy(os.path.join(segments_dir, live), os.path.join(segments_dir, "seg-000099.npz"))
+        reopened = TalentIndex(self.tmp.name)
+        assert os.listdir(segments_dir) == [live]
+        assert [score > 0 for score, _ in reopened.search("python")] == [True, True]
+
+
+if __name__ == "__main__":
+    unittest.main()
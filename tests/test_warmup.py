@@ -0,0 +1,103 @@
+"""
+Test suite for model pinning (keep_alive) and the launch warm-up
+"""
+
+import unittest
+from src.modules import llm_analyzer
+from src.modules.llm_analyzer import PINNED_KEEP_ALIVE, LLMAnalyzer, _effective_keep_alive, pinned_models
+from src.modules.warmup import FAILED, LOADING, PENDING, READY, ModelWarmup
+
+
+class FakeAnalyzer(LLMAnalyzer):
+    """Pas de réseau : warm_up et /api/ps sont simulés."""
+
+    def __init__(self, loaded=(), failing=()):
+        super().__init__()
+        self.text_model, self.vision_model, self.keep_alive = "llama3.2", "llava", "1h"
+        self.loaded = set(loaded)
+        self.failing = set(failing)
+        self.calls = []
+
+    def warm_up(self, model, keep_alive=None, timeout=300):
+        self.calls.append((model, keep_alive))
+        return model not in self.failing
+
+    def loaded_models(self):
+        return set(self.loaded)
+
+
+class TestPinnedModels(unittest.TestCase):
+    """Test the process-wide pin refcount and the keep_alive restore."""
+
+    def setUp(self):
+        assert llm_analyzer._pin_count == 0
+        self.analyzer = FakeAnalyzer(loaded={"llama3.2:latest", "mistral:latest"})
+
+    def tearDown(self):
+        llm_analyzer._pin_count = 0
+
+    def test_nested_pins_restore_on_last_exit_only(self):
+        with pinned_models(self.analyzer):
+            assert self.analyzer.calls == [("llama3.2", PINNED_KEEP_ALIVE)]
+            assert _effective_keep_alive("1h") == PINNED_KEEP_ALIVE
+            with pinned_models(self.analyzer):
+                pass
+            assert self.analyzer.calls == [("llama3.2", PINNED_KEEP_ALIVE)] # ni re-pin ni restore
+            assert _effective_keep_alive("1h") == PINNED_KEEP_ALIVE
+        # Seuls les modèles de l'app chargés par Ollama reviennent au keep_alive normal
+        assert self.analyzer.calls[1:] == [("llama3.2:latest", "1h")]
+        assert _effective_keep_alive("1h") == "1h"
+
+    def test_overlapping_pins_from_two_campaigns(self):
+        other = FakeAnalyzer(loaded={"llama3.2:latest", "llava:latest"})
+        first, second = pinned_models(self.analyzer), pinned_models(other)
+        first.__enter__()
+        second.__enter__()
+        assert other.calls == [] # déjà épinglé par la première campagne
+        first.__exit__(None, None, None)
+        assert self.analyzer.calls == [("llama3.2", PINNED_KEEP_ALIVE)]
+        assert _effective_keep_alive("1h") == PINNED_KEEP_ALIVE
+        second.__exit__(None, None, None)
+        assert sorted(other.calls) == [("llama3.2:latest", "1h"), ("llava:latest", "1h")]
+        assert llm_analyzer._pin_count == 0
+
+    def test_pin_released_on_error(self):
+        with self.assertRaises(RuntimeError):
+            with pinned_models(self.analyzer):
+                raise RuntimeError("campagne interrompue")
+        assert llm_analyzer._pin_count == 0
+        assert self.analyzer.calls[-1] == ("llama3.2:latest", "1h")
+
+
+class TestModelWarmup(unittest.TestCase):
+    """Test the warm-up state machine and its resync with /api/ps."""
+
+    def test_run_marks_ready_and_failed(self):
+        analyzer = FakeAnalyzer(failing={"llava"})
+        warmup = ModelWarmup(analyzer)
+        warmup.start()._thread.join(5)
+        assert [model for model, _ in analyzer.calls] == ["llama3.2", "llava"] # texte d'abord
+        assert warmup.status == {"llama3.2": READY, "llava": FAILED}
+        assert warmup.is_ready("llama3.2") and not warmup.is_ready()
+
+    def test_refresh_follows_loaded_models(self):
+        analyzer = FakeAnalyzer(loaded={"llama3.2:latest"})
+        warmup = ModelWarmup(analyzer)
+        assert warmup.refresh() == {"llama3.2": READY, "llava": PENDING}
+
+        # Modèle déchargé par Ollama (keep_alive expiré) : de nouveau à charger
+        analyzer.loaded = set()
+        assert warmup.refresh() == {"llama3.2": PENDING, "llava": PENDING}
+
+    def test_refresh_leaves_loading_and_failed_alone(self):
+        analyzer = FakeAnalyzer(loaded={"llava:latest"})
+        warmup = ModelWarmup(analyzer)
+        warmup.status.update({"llama3.2": LOADING, "llava": FAILED})
+        analyzer.loaded = set()
+        assert warmup.refresh() == {"llama3.2": LOADING, "llava": FAILED}
+        analyzer.loaded = {"llava:latest"}
+        assert warmup.refresh()["llava"] == READY
+
+
+if __name__ == "__main__":
+    unittest.main()